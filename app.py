@@ -1,34 +1,77 @@
 import io
 import time
 import uuid
-from flask import Flask, abort, request, jsonify, send_from_directory
+from flask import Flask, abort, g, request, jsonify, send_from_directory
 import os
 from flask_cors import CORS
-from werkzeug.utils import secure_filename, safe_join
+from werkzeug.utils import safe_join
 
-from extractor import PDFSelectiveNumericTableExtractor
-import pdfplumber
-from PIL import ImageDraw
-
-from helpers.extract.routes.extract_preview_handler import run_extract_preview  # ✅ NEW IMPORT
+# The PDF and imaging stack (pdfplumber, PIL, pandas and the handlers that use
+# them) is imported inside the routes that need it, so a cold start that only
+# serves / or a CORS preflight never loads it
+from helpers.extract.services.admission import get_admission
+from helpers.extract.services.job_queue import job_queue_depth
+from helpers.extract.services.shape_storage import get_shape_storage
+from helpers.extract.services.uploads import UploadRequest, request_pdf_upload
+from helpers.extract.services.warmup import warmed_up
+from helpers.extract.core.diagnostics import request_flag
+from helpers.extract.core.page_ranges import PageRangeError, requested_pages
+from helpers.extract.core.metrics import (
+    REQUEST_SECONDS,
+    render_metrics,
+    server_timing_header,
+    start_request_timings
+)
 
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'pdf'}
 EXTRACTED_SHAPES_FOLDER = 'extracted_shapes'
 MAGIC_NUMBER = 3
-os.makedirs(EXTRACTED_SHAPES_FOLDER, exist_ok=True)
 BASE_URL = "http://127.0.0.1:5000/"
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app, origins=[
     "https://trgovir.vercel.app",
     "http://localhost:3000"
 ], supports_credentials=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024
 app.config["DRAW_DEBUG_SHAPES"] = False
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+app.config["EXTRACT_DIAGNOSTICS"] = False
+app.config["BATCH_CELL_TEXT"] = True
+app.config["PARALLEL_PAGE_WORKERS"] = 0
+app.config["SHAPE_RENDER_MODE"] = "page"
+app.config["SHAPE_RENDER_DPI"] = 300
+app.config["PREVIEW_MODE"] = "shape"
+app.config["PREVIEW_DPI"] = 72
+app.config["SHAPE_STORE"] = "request"
+app.config["SHAPE_IMAGE_FORMAT"] = "png"
+app.config["SHAPE_IMAGE_MODE"] = "rgb"
+app.config["SHAPE_PNG_COMPRESS_LEVEL"] = None
+app.config["SHAPE_WEBP_QUALITY"] = 80
+app.config["SHAPE_WEBP_LOSSLESS"] = True
+app.config["IMAGE_WRITER_WORKERS"] = 2
+app.config["IMAGE_WRITER_MAX_PENDING"] = 32
+app.config["BOUNDED_MEMORY"] = False
+app.config["MEMORY_BUDGET_MB"] = 0
+app.config["JOBS_FOLDER"] = "extract_jobs"
+app.config["JOB_WORKERS"] = 2
+app.config["JOBS_TTL_SECONDS"] = 24 * 3600
+app.config["RESULT_CACHE_ENABLED"] = True
+app.config["RESULT_CACHE_FOLDER"] = "result_cache"
+app.config["RESULT_CACHE_MAX_BYTES"] = 256 * 1024 * 1024
+app.config["PAGE_CACHE_ENABLED"] = True
+app.config["PAGE_CACHE_FOLDER"] = "page_cache"
+app.config["PAGE_CACHE_MAX_BYTES"] = 256 * 1024 * 1024
+app.config["EXTRACTED_SHAPES_FOLDER"] = EXTRACTED_SHAPES_FOLDER
+app.config["SHAPES_SWEEPER_ENABLED"] = True
+app.config["SHAPES_TTL_SECONDS"] = 24 * 3600
+app.config["SHAPES_MAX_BYTES"] = 2 * 1024 ** 3
+app.config["SHAPES_SWEEP_INTERVAL"] = 300
+app.config["EXTRACT_CONCURRENCY"] = int(os.environ.get("EXTRACT_CONCURRENCY", 2))
+app.config["EXTRACT_ADMISSION_WAIT"] = 0
+app.config["EXTRACT_RETRY_AFTER"] = 5
+app.config["JOB_QUEUE_LIMIT"] = 16
 
 def object_in_any_row_y(obj, row_bboxes, margin=1):
     oy0 = obj['y0']
@@ -40,7 +83,7 @@ def object_in_any_row_y(obj, row_bboxes, margin=1):
 
 @app.route('/extracted_shapes/<path:timestamp>/<path:filename>')
 def serve_extracted_shape(timestamp, filename):
-    if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+    if not filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
         abort(403)
 
     directory = safe_join(app.root_path, EXTRACTED_SHAPES_FOLDER, timestamp)
@@ -52,8 +95,18 @@ def serve_extracted_shape(timestamp, filename):
         app.logger.error(f"Shape file not found: {full_path}")
         abort(404)
 
+    get_shape_storage(app).touch(timestamp, filename)
     return send_from_directory(directory, filename)
 
+@app.route('/storage/usage', methods=['GET'])
+def storage_usage():
+    return jsonify(get_shape_storage(app).usage())
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+    return jsonify({'error': f'File is larger than the {limit_mb} MB upload limit'}), 413
+
 @app.after_request
 def add_cors_headers(response):
     origin = request.headers.get('Origin')
@@ -71,62 +124,179 @@ def extract_preview_options():
 
 @app.route('/extract', methods=['POST'])
 def extract_pdf():
+    from extractor import PDFSelectiveNumericTableExtractor
+    from helpers.extract.services.recap import recap_rows
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file part in request'}), 400
 
-    file = request.files['file']
-
-    if file.filename == '':
+    if request.files['file'].filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-
-        extractor = PDFSelectiveNumericTableExtractor(
-            pdf_path=file_path,
-            columns_to_extract=[0, 2, 3, 4, 5],
-            indicator_texts=[
-                "Šiple - specifikacija", "Šipke-specifikacija",
-                "šipke-Specifikacija", "šipke - Specifikacija",
-                "Šipke-Specifikacija", "Šipke - Specifikacija",
-                "SPECIFIKACIJA - Armaturne šipke"
-            ],
-            field_mapping={
-                "ozn": 0,
-                "diameter": 2,
-                "lg": 3,
-                "n": 4,
-                "lgn": 5
-            }
-        )
-        data = extractor.run()
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except OSError as e:
-                app.logger.error(f"Error removing uploaded file {file_path}: {e}")
-        return jsonify(data)
+    source, error = request_pdf_upload(request)
+    if error:
+        return jsonify(error[0]), error[1]
+    pages, error = requested_pages(request)
+    if error:
+        return jsonify(error[0]), error[1]
 
-    return jsonify({'error': 'Invalid file type'}), 400
+    # The spooled upload is removed when the request ends
+    extractor = PDFSelectiveNumericTableExtractor(
+        pdf_path=source.path,
+        columns_to_extract=[0, 2, 3, 4, 5],
+        indicator_texts=[
+            "Šiple - specifikacija", "Šipke-specifikacija",
+            "šipke-Specifikacija", "šipke - Specifikacija",
+            "Šipke-Specifikacija", "Šipke - Specifikacija",
+            "SPECIFIKACIJA - Armaturne šipke"
+        ],
+        field_mapping={
+            "ozn": 0,
+            "diameter": 2,
+            "lg": 3,
+            "n": 4,
+            "lgn": 5
+        },
+        batch_cell_text=app.config.get("BATCH_CELL_TEXT", False),
+        release_pages=app.config.get("BOUNDED_MEMORY", False),
+        pages=pages
+    )
+    try:
+        data = extractor.run()
+    except PageRangeError as e:
+        return jsonify({ "error": str(e) }), 400
+    if request_flag(request, "recap"):
+        return jsonify({"rows": data, "recap": recap_rows(data)})
+    return jsonify(data)
 
 @app.route('/extract-preview', methods=['POST'])
 def extract_preview():
+    from helpers.extract.routes.extract_preview_handler import run_extract_preview
+    from helpers.extract.services.recap import recap_payload
+
     result = run_extract_preview(request)  # ✅ ONLY THIS LINE IS NEW
     if isinstance(result, tuple):
         return jsonify(result[0]), result[1]
+    if request_flag(request, "recap"):
+        return jsonify({"groups": result, "recap": recap_payload(result)})
     return jsonify(result)
 
+@app.route('/scan', methods=['POST'])
+def scan():
+    from helpers.extract.routes.scan_handler import run_scan
+
+    result = run_scan(request)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@app.route('/extract-preview/stream', methods=['POST'])
+def extract_preview_stream():
+    from helpers.extract.routes.extract_stream_handler import stream_extract_preview
+
+    result = stream_extract_preview(request)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return result
+
+@app.route('/extract-preview/export', methods=['POST'])
+def extract_preview_export():
+    from helpers.extract.routes.extract_export_handler import export_extract_preview
+
+    result = export_extract_preview(request)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return result
+
+@app.route('/extract-preview/jobs', methods=['POST'])
+def extract_preview_job_submit():
+    from helpers.extract.routes.extract_jobs_handler import submit_extract_job
+
+    result = submit_extract_job(request)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), *result[1:]
+    return jsonify(result)
+
+@app.route('/extract-preview/jobs/<job_id>', methods=['GET'])
+def extract_preview_job_status(job_id):
+    from helpers.extract.routes.extract_jobs_handler import get_extract_job
+
+    result = get_extract_job(job_id)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    return jsonify(result)
+
+@app.route('/extract-preview/jobs/<job_id>/result', methods=['GET'])
+def extract_preview_job_result(job_id):
+    from helpers.extract.routes.extract_jobs_handler import get_extract_job_result
+    from helpers.extract.services.recap import recap_payload
+
+    result = get_extract_job_result(job_id)
+    if isinstance(result, tuple):
+        return jsonify(result[0]), result[1]
+    if request_flag(request, "recap"):
+        return jsonify({"groups": result, "recap": recap_payload(result)})
+    return jsonify(result)
+
+SERVER_TIMING_ENDPOINTS = {"extract_pdf", "extract_preview"}
+ADMISSION_ENDPOINTS = {"extract_pdf", "extract_preview", "extract_preview_stream", "extract_preview_export", "scan"}
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
 @app.before_request
 def before():
     app.logger.info(f"Start: {request.method} {request.path}")
+    g.request_start = time.perf_counter()
+    start_request_timings()
+    if app.config.get("SHAPES_SWEEPER_ENABLED"):
+        get_shape_storage(app).start()
+    if request.method != "OPTIONS" and request.endpoint in ADMISSION_ENDPOINTS:
+        admission = get_admission(app)
+        if not admission.try_acquire():
+            response = jsonify({ "error": "Server busy, retry later" })
+            response.headers["Retry-After"] = str(admission.retry_after)
+            return response, 429
+        g.admitted = True
+
+@app.teardown_request
+def release_admission(error=None):
+    # Streamed responses keep their slot until the stream has finished
+    if g.pop("admitted", False):
+        get_admission(app).release()
 
 @app.after_request
 def after(response):
-    app.logger.info(f"End: {request.method} {request.path}")
+    duration = time.perf_counter() - g.get("request_start", time.perf_counter())
+    REQUEST_SECONDS.observe(
+        duration,
+        method=request.method,
+        endpoint=request.endpoint or "unmatched",
+        status=response.status_code
+    )
+    if request.endpoint in SERVER_TIMING_ENDPOINTS:
+        header = server_timing_header()
+        if header:
+            response.headers["Server-Timing"] = header
+    app.logger.info(f"End: {request.method} {request.path} {response.status_code} in {duration * 1000:.0f}ms")
     return response
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({ "status": "ok" })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    admission = get_admission(app)
+    result = {
+        "status": "busy" if admission.saturated else "ready",
+        "warmed_up": warmed_up(),
+        "extractions": admission.status(),
+        "jobs_pending": job_queue_depth()
+    }
+    return jsonify(result), 503 if admission.saturated else 200
+
 @app.route('/', methods=['GET'])
 def index():
     result = { "response": "Hello World" }
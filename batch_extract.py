@@ -0,0 +1,200 @@
+"""Offline batch extraction of archived PDF specifications.
+
+Runs the numeric table extractor and the shape pipeline (the same pipeline as
+/extract-preview) over every PDF given, one file per pool process, and writes
+one JSON result per PDF plus summary.json with per-file timings.
+
+    python batch_extract.py archive/ --output results/
+    python batch_extract.py "archive/2024/**/*.pdf" --output results/ --workers 4
+    python batch_extract.py archive/ --output results/ --force
+
+Re-running is cheap: a PDF is skipped when its result is newer than the PDF
+and was produced with the current extraction config (indicator texts, field
+mapping and the render/image settings). --force reprocesses everything.
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SUMMARY_FILENAME = "summary.json"
+PAGE_CACHE_SUBFOLDER = ".page_cache"
+
+_worker = {}
+
+
+def find_pdfs(inputs):
+    pdfs = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.pdf")
+        pdfs.extend(
+            path for path in glob.glob(pattern, recursive=True)
+            if os.path.isfile(path) and path.lower().endswith(".pdf")
+        )
+    return sorted(set(os.path.abspath(path) for path in pdfs))
+
+
+def output_paths(pdfs, output_folder):
+    # Mirror the layout below the inputs' common folder, so equal names never collide
+    root = os.path.commonpath([os.path.dirname(path) for path in pdfs])
+    return {
+        path: os.path.join(output_folder, os.path.splitext(os.path.relpath(path, root))[0] + ".json")
+        for path in pdfs
+    }
+
+
+def is_up_to_date(pdf_path, output_path, config_version):
+    try:
+        if os.path.getmtime(output_path) < os.path.getmtime(pdf_path):
+            return False
+        with open(output_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("config_version") == config_version
+    except (OSError, ValueError):
+        return False
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(config):
+    from helpers.extract.services.parallel_pages import WorkerApp
+
+    _worker["app"] = WorkerApp(config)
+
+
+def _extract_file(pdf_path, output_path, config_version):
+    import pdfplumber
+
+    from helpers.extract.routes.extract_preview_handler import run_preview_pipeline
+
+    started = time.perf_counter()
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            pages = len(pdf.pages)
+            payload = run_preview_pipeline(_worker["app"], pdf)
+    except Exception as e:
+        return { "status": "failed", "error": str(e), "seconds": round(time.perf_counter() - started, 3) }
+
+    seconds = round(time.perf_counter() - started, 3)
+    write_json(output_path, {
+        "source": pdf_path,
+        "config_version": config_version,
+        "seconds": seconds,
+        "pages": pages,
+        "payload": payload
+    })
+    return {
+        "status": "done",
+        "seconds": seconds,
+        "pages": pages,
+        "groups": len(payload),
+        "rows": sum(len(group["rows"]) for group in payload)
+    }
+
+
+def batch_config(app, output_folder, shapes_folder=None):
+    from helpers.extract.services.parallel_pages import worker_config
+
+    config = worker_config(app)
+    # Files are already spread over processes; nested page pools would only oversubscribe
+    config["PARALLEL_PAGE_WORKERS"] = 0
+    # Unchanged pages of revised files are reused from a page cache kept with
+    # the results, not in whatever folder the batch was started from
+    config["RESULT_CACHE_ENABLED"] = False
+    config["PAGE_CACHE_FOLDER"] = os.path.abspath(os.path.join(output_folder, PAGE_CACHE_SUBFOLDER))
+    if shapes_folder:
+        config["EXTRACTED_SHAPES_FOLDER"] = os.path.abspath(shapes_folder)
+    return config
+
+
+def run_batch(pdfs, output_folder, config, config_version, workers, force=False, start_method="spawn"):
+    outputs = output_paths(pdfs, output_folder)
+    report = {}
+    pending = []
+    for pdf_path in pdfs:
+        if not force and is_up_to_date(pdf_path, outputs[pdf_path], config_version):
+            report[pdf_path] = { "status": "skipped", "output": outputs[pdf_path] }
+        else:
+            pending.append(pdf_path)
+
+    started = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(config,)
+        ) as pool:
+            futures = {
+                pool.submit(_extract_file, pdf_path, outputs[pdf_path], config_version): pdf_path
+                for pdf_path in pending
+            }
+            for future in as_completed(futures):
+                pdf_path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # the worker process itself died
+                    result = { "status": "failed", "error": str(e) }
+                result["output"] = outputs[pdf_path]
+                report[pdf_path] = result
+                print(f"{result['status']:>7} {result.get('seconds', 0):8.2f}s  {pdf_path}", flush=True)
+
+    files = [{ "file": pdf_path, **report[pdf_path] } for pdf_path in pdfs]
+    summary = {
+        "config_version": config_version,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "totals": {
+            status: sum(1 for entry in files if entry["status"] == status)
+            for status in ("done", "skipped", "failed")
+        },
+        "files": files
+    }
+    write_json(os.path.join(output_folder, SUMMARY_FILENAME), summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="PDF files, folders (searched recursively) or glob patterns")
+    parser.add_argument("--output", required=True, help="folder for the per-file JSON results and summary.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shapes-folder", help="where shape images go (default: EXTRACTED_SHAPES_FOLDER)")
+    parser.add_argument("--force", action="store_true", help="reprocess files whose results are up to date")
+    args = parser.parse_args(argv)
+
+    pdfs = find_pdfs(args.inputs)
+    if not pdfs:
+        parser.error("no PDFs found")
+
+    from app import app
+    from helpers.extract.routes.extract_preview_handler import FIELD_MAPPING, INDICATOR_TEXTS
+    from helpers.extract.services.result_cache import extraction_config_version
+
+    config = batch_config(app, args.output, args.shapes_folder)
+    summary = run_batch(
+        pdfs, args.output, config,
+        extraction_config_version(app, INDICATOR_TEXTS, FIELD_MAPPING),
+        max(1, args.workers), args.force, app.config.get("PARALLEL_START_METHOD", "spawn")
+    )
+
+    totals = summary["totals"]
+    print(
+        f"{totals['done']} extracted, {totals['skipped']} up to date, {totals['failed']} failed "
+        f"in {summary['wall_seconds']:.1f}s; summary in {os.path.join(args.output, SUMMARY_FILENAME)}"
+    )
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Per-stage benchmarks of the extraction pipeline.
+
+Runs each stage separately over the fixture PDFs (tests/fixtures/*/test_file.pdf)
+and the PDFs in the repo root, and reports wall time, CPU time and peak
+Python heap per stage, with per-page wall times.
+
+    python benchmarks/run_benchmarks.py                   # run and compare to the baseline
+    python benchmarks/run_benchmarks.py --save-baseline   # record a new baseline
+    python benchmarks/run_benchmarks.py extra.pdf --repeat 3 --threshold 0.15
+
+Exits with status 1 when a stage is slower (or its peak memory larger) than
+the baseline by more than --threshold. Baselines are machine specific, so
+record one on the machine you compare on.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+import pdfplumber
+
+from app import app as flask_app
+from extractor import PDFSelectiveNumericTableExtractor
+from helpers.extract.core.image_writer import image_output_settings, write_image
+from helpers.extract.core.indicator_matcher import get_indicator_matcher
+from helpers.extract.core.page_analysis import PageAnalysis
+from helpers.extract.core.page_extraction import collect_page_images
+from helpers.extract.core.page_render import render_page
+from helpers.extract.routes.extract_preview_handler import FIELD_MAPPING, INDICATOR_TEXTS
+from helpers.extract.services.extract_from_pdf import page_context
+from helpers.extract.services.parallel_pages import WorkerApp, worker_config
+
+STAGES = ("open", "indicator_scan", "find_tables", "numeric_extraction", "render", "crop", "save")
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "baseline.json")
+MB = 1024 * 1024
+
+
+class StageTimer:
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, page_num=None):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            base_memory = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            entry = self.stages.setdefault(name, { "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": 0.0, "per_page": {} })
+            entry["wall_s"] += wall
+            entry["cpu_s"] += cpu
+            if page_num is not None:
+                entry["per_page"][str(page_num)] = entry["per_page"].get(str(page_num), 0.0) + wall
+            if self.track_memory:
+                peak = (tracemalloc.get_traced_memory()[1] - base_memory) / MB
+                entry["peak_mb"] = max(entry["peak_mb"], peak)
+
+
+class DeferredWriter:
+    """Holds the crops back so encoding and writing can be timed as their own stage."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.pending = []
+
+    def write(self, image, path, atomic=False):
+        self.pending.append((image, path, atomic))
+
+
+def run_stages(pdf_path, app, timer):
+    with timer.stage("open"):
+        pdf = pdfplumber.open(pdf_path)
+
+    with pdf:
+        matcher = get_indicator_matcher(tuple(INDICATOR_TEXTS))
+        analyses = [(page_num, PageAnalysis(page, matcher)) for page_num, page in enumerate(pdf.pages)]
+
+        for page_num, analysis in analyses:
+            with timer.stage("indicator_scan", page_num):
+                analysis.contains_indicator
+        matched = [(page_num, analysis) for page_num, analysis in analyses if analysis.contains_indicator]
+
+        for page_num, analysis in matched:
+            with timer.stage("find_tables", page_num):
+                analysis.tables
+
+        extractor = PDFSelectiveNumericTableExtractor(
+            pdf_path=pdf_path,
+            columns_to_extract=[],
+            indicator_texts=INDICATOR_TEXTS,
+            field_mapping=FIELD_MAPPING,
+            pdf=pdf,
+            batch_cell_text=app.config.get("BATCH_CELL_TEXT", False)
+        )
+        rows = 0
+        for page_num, analysis in matched:
+            with timer.stage("numeric_extraction", page_num):
+                rows += len(extractor.extract_page_rows(analysis))
+
+        images = 0
+        settings = image_output_settings(app)
+        resolution = app.config.get("SHAPE_RENDER_DPI", 300)
+        folder = app.config["EXTRACTED_SHAPES_FOLDER"]
+        for page_num, analysis in matched:
+            if not analysis.tables:
+                continue
+            with timer.stage("render", page_num):
+                image = render_page(analysis.page, resolution)
+
+            writer = DeferredWriter(settings)
+            with timer.stage("crop", page_num):
+                ctx = page_context(
+                    app, analysis, page_num, analysis.tables[0], image, (0, 0), None, image.size,
+                    folder, "bench", image_writer=writer
+                )
+                images += len(collect_page_images(ctx)["images"])
+
+            with timer.stage("save", page_num):
+                for crop, path, atomic in writer.pending:
+                    write_image(crop, path, writer.settings, atomic)
+
+    return { "pages": len(analyses), "matched_pages": len(matched), "rows": rows, "images": images }
+
+
+def bench_pdf(pdf_path, app, repeat, track_memory):
+    best = None
+    for _ in range(repeat):
+        timer = StageTimer()
+        counts = run_stages(pdf_path, app, timer)
+        total = sum(entry["wall_s"] for entry in timer.stages.values())
+        if best is None or total < best[0]:
+            best = (total, counts, timer.stages)
+    _, counts, stages = best
+
+    if track_memory:
+        # A separate pass: tracemalloc would distort the timings above
+        timer = StageTimer(track_memory=True)
+        tracemalloc.start()
+        try:
+            run_stages(pdf_path, app, timer)
+        finally:
+            tracemalloc.stop()
+        for name, entry in timer.stages.items():
+            stages[name]["peak_mb"] = entry["peak_mb"]
+
+    for entry in stages.values():
+        entry["wall_s"] = round(entry["wall_s"], 4)
+        entry["cpu_s"] = round(entry["cpu_s"], 4)
+        entry["peak_mb"] = round(entry["peak_mb"], 2)
+        entry["per_page"] = { page: round(wall, 4) for page, wall in entry["per_page"].items() }
+    return { **counts, "stages": stages }
+
+
+def default_pdfs():
+    fixtures = sorted(glob.glob(os.path.join(BASE_DIR, "tests", "fixtures", "*", "test_file.pdf")))
+    root_pdfs = sorted(glob.glob(os.path.join(BASE_DIR, "*.pdf")))
+    return fixtures + root_pdfs
+
+
+def compare_to_baseline(results, baseline, threshold, min_seconds, min_mb):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for stage, entry in result["stages"].items():
+            base_entry = base["stages"].get(stage)
+            if base_entry is None:
+                continue
+            for metric, floor in (("wall_s", min_seconds), ("cpu_s", min_seconds), ("peak_mb", min_mb)):
+                before, after = base_entry.get(metric, 0), entry[metric]
+                if after > before * (1 + threshold) and after - before > floor:
+                    regressions.append(f"{name} {stage} {metric}: {before} -> {after}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'pdf':<48} {'stage':<20} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+    for name, result in results.items():
+        for stage in STAGES:
+            entry = result["stages"].get(stage)
+            if entry is not None:
+                print(f"{name[-48:]:<48} {stage:<20} {entry['wall_s']:>9.3f} {entry['cpu_s']:>9.3f} {entry['peak_mb']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs to benchmark (default: fixtures and repo-root PDFs)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per PDF; the fastest is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the results JSON here")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown per stage")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore time regressions smaller than this")
+    parser.add_argument("--min-mb", type=float, default=1.0, help="ignore memory regressions smaller than this")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    pdfs = args.pdfs or default_pdfs()
+    if not pdfs:
+        parser.error("no PDFs found")
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        config = worker_config(flask_app)
+        config.update(TESTING=True, EXTRACTED_SHAPES_FOLDER=output_folder, SHAPE_STORE="request")
+        app = WorkerApp(config)
+        os.makedirs(os.path.join(output_folder, "bench"), exist_ok=True)
+
+        results = {}
+        for pdf_path in pdfs:
+            name = os.path.relpath(os.path.abspath(pdf_path), BASE_DIR)
+            results[name] = bench_pdf(pdf_path, app, max(1, args.repeat), not args.no_memory)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.threshold, args.min_seconds, args.min_mb)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Cold-start benchmark of the Flask app.
+
+Each run starts a fresh interpreter and measures, in order: importing app.py,
+the first GET /, the first CORS preflight (OPTIONS /extract-preview) and the
+first POST /extract-preview on the bundled default PDF (result and page caches
+off, shape images written to a temporary folder). The first request timings include any
+imports the route triggers, which is what a serverless cold start pays.
+
+    python benchmarks/startup_benchmark.py                   # run and compare to the baseline
+    python benchmarks/startup_benchmark.py --save-baseline   # record a new baseline
+    python benchmarks/startup_benchmark.py --repeat 5 --skip-extract
+
+Exits with status 1 when a step is slower than the baseline by more than
+--threshold (and by at least --min-seconds). Baselines are machine specific.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "startup_baseline.json")
+STEPS = ("import_app", "first_index", "first_preflight", "first_extract_preview")
+
+CHILD = r"""
+import json, sys, tempfile, time
+start = time.perf_counter()
+from app import app
+timings = { "import_app": time.perf_counter() - start }
+heavy_after_import = [name for name in ("pdfplumber", "PIL", "pandas") if name in sys.modules]
+
+with tempfile.TemporaryDirectory() as folder:
+    app.config.update(
+        TESTING=True, RESULT_CACHE_ENABLED=False, PAGE_CACHE_ENABLED=False, SHAPES_SWEEPER_ENABLED=False,
+        EXTRACTED_SHAPES_FOLDER=folder, UPLOAD_FOLDER=folder
+    )
+    client = app.test_client()
+    requests = [
+        ("first_index", lambda: client.get("/")),
+        ("first_preflight", lambda: client.options(
+            "/extract-preview",
+            headers={ "Origin": "http://localhost:3000", "Access-Control-Request-Method": "POST" }
+        ))
+    ]
+    if not SKIP_EXTRACT:
+        requests.append(("first_extract_preview", lambda: client.post("/extract-preview")))
+    for name, send in requests:
+        start = time.perf_counter()
+        response = send()
+        timings[name] = time.perf_counter() - start
+        if response.status_code >= 400:
+            sys.exit(f"{name} failed with status {response.status_code}")
+
+print(json.dumps({ "timings": timings, "heavy_after_import": heavy_after_import }))
+"""
+
+
+def run_once(skip_extract):
+    completed = subprocess.run(
+        [sys.executable, "-c", f"SKIP_EXTRACT = {skip_extract!r}\n" + CHILD],
+        cwd=BASE_DIR, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Startup run failed:\n{completed.stderr or completed.stdout}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(repeat, skip_extract):
+    runs = [run_once(skip_extract) for _ in range(repeat)]
+    # Fastest of the runs: the noise on a cold start is all on the slow side
+    timings = {
+        step: round(min(run["timings"][step] for run in runs), 4)
+        for step in STEPS if step in runs[0]["timings"]
+    }
+    return { "timings": timings, "heavy_after_import": runs[0]["heavy_after_import"] }
+
+
+def compare_to_baseline(results, baseline, threshold, min_seconds):
+    regressions = []
+    for step, seconds in results["timings"].items():
+        base = baseline.get("timings", {}).get(step)
+        if base is None:
+            continue
+        if seconds - base >= min_seconds and seconds > base * (1 + threshold):
+            regressions.append(f"{step}: {base:.3f}s -> {seconds:.3f}s")
+    for name in results["heavy_after_import"]:
+        if name not in baseline.get("heavy_after_import", []):
+            regressions.append(f"importing app now loads {name}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters to start; the fastest is kept")
+    parser.add_argument("--skip-extract", action="store_true", help="skip the first /extract-preview")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown per step")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore regressions smaller than this")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(max(1, args.repeat), args.skip_extract)
+    for step, seconds in results["timings"].items():
+        print(f"{step:<24}{seconds * 1000:10.1f} ms")
+    print(f"{'loaded by import app':<24}{', '.join(results['heavy_after_import']) or '-':>13}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.threshold, args.min_seconds)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,14 +4,30 @@ import os
 import re
 from typing import List, Optional, Dict
 
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.core.cell_text import CellTextIndex
+from helpers.extract.core.indicator_matcher import get_indicator_matcher
+from helpers.extract.core.metrics import ROWS_EXTRACTED, stage
+from helpers.extract.core.table_templates import (
+    column_plan,
+    resolve_table_template,
+    table_fingerprint
+)
+
 class PDFSelectiveNumericTableExtractor:
-    def __init__(self, pdf_path: str, columns_to_extract: List[int], indicator_texts: List[str], field_mapping: Dict[str, int], pdf = None):
+    def __init__(self, pdf_path: str, columns_to_extract: List[int], indicator_texts: List[str], field_mapping: Dict[str, int], pdf = None, page_cache: Optional[PageAnalysisCache] = None, batch_cell_text: bool = False, release_pages: bool = False, cached_pages = None, pages: Optional[List[int]] = None):
         self.pdf_path = pdf_path
         self.columns_to_extract = columns_to_extract
         self.indicator_texts = indicator_texts
         self.field_mapping = field_mapping
         self.rows = []
         self.pdf = pdf
+        self.page_cache = page_cache
+        self.batch_cell_text = batch_cell_text
+        self.release_pages = release_pages
+        self.cached_pages = cached_pages
+        self.pages = pages
+        self.owns_pdf = False
 
     def clean_number(self, value: str) -> Optional[float | int]:
         if(value == ''): return 0
@@ -39,107 +55,112 @@ class PDFSelectiveNumericTableExtractor:
         )
 
     def page_contains_indicator(self, page) -> bool:
-        text = page.extract_text()
-        if not text:
+        matcher = get_indicator_matcher(tuple(self.indicator_texts))
+        if not matcher.could_match_chars(page.chars):
             return False
-        for indicator in self.indicator_texts:
-            if indicator.lower() in text.lower():
-                return True
-        return False
-
-    def extract(self):
-        if self.pdf is not None:
-            pdf = self.pdf
+        return matcher.matches(page.extract_text())
+
+    def get_page_cache(self) -> PageAnalysisCache:
+        if self.page_cache is None:
+            if self.pdf is None:
+                self.pdf = pdfplumber.open(self.pdf_path)
+                self.owns_pdf = True
+            self.page_cache = PageAnalysisCache(self.pdf, self.indicator_texts, self.pages)
+        return self.page_cache
+
+    def table_column_plan(self, table, header_texts):
+        fingerprint = table_fingerprint(table, header_texts)
+        template = resolve_table_template(fingerprint)
+        mapping = template["mapping"] if template is not None else self.field_mapping
+        return column_plan(mapping, len(header_texts))
+
+    def extract_page_rows(self, analysis) -> List[Dict[str, Optional[float | int]]]:
+        rows = []
+        if not analysis.contains_indicator:
+            return rows
+
+        page = analysis.page
+        tables = analysis.tables
+        if not tables:
+            return rows
+
+        with stage("row_parsing"):
+            rows = self.parse_tables(page, analysis, tables)
+        ROWS_EXTRACTED.inc(len(rows))
+        return rows
+
+    def parse_tables(self, page, analysis, tables) -> List[Dict[str, Optional[float | int]]]:
+        rows = []
+        if self.batch_cell_text:
+            cell_text = CellTextIndex(page, analysis.chars).text
         else:
-            pdf = pdfplumber.open(self.pdf_path)
-
-        for page_num, page in enumerate(pdf.pages):
-            if not self.page_contains_indicator(page):
-                continue
-
-            table_settings = {
-                "vertical_strategy": "lines",
-                "horizontal_strategy": "lines",
-            }
-            tables = page.find_tables(table_settings=table_settings)
-            if not tables:
-                continue
-
-            for table_idx, table in enumerate(tables):
-                for row_idx, row in enumerate(table.rows):
-                    # 🛑 STOP parsing more rows if this row contains the stop keyword
-                    row_text = " ".join(
-                        filter(None, [
-                            page.crop(self.clamp_bbox(cell, page)).extract_text() if cell else ""
-                            for cell in row.cells
-                        ])
-                    ).lower()
-
-                    if ("mreže - specifikacija" or "mreže - rekapitulacija" or "šipke - rekapitulacija") in row_text:
-                        break  # stop parsing rows for this page
-
-                    # 👇 Use backup_field_mappings for 12-cell rows
-                    # print("Length of cells ",len(row.cells))
-                    if len(row.cells) == 12:
-                        used_mapping = {
-                            "ozn": 0,
-                            "diameter": 6,
-                            "lg": 8,
-                            "n": 10,
-                            "lgn": 11
-                        }
-                    elif len(row.cells) == 10:
-                        used_mapping = {
-                            "ozn": 0,
-                            "diameter": 3,
-                            "lg": 5,
-                            "n": 6,
-                            "lgn": 8
-                        }
-                    elif len(row.cells) == 16:
-                        used_mapping = {
-                            "ozn": 0,
-                            "diameter": 7,
-                            "lg": 9,
-                            "n": 11,
-                            "lgn": 13
-                        }
-                    elif len(row.cells) == 9:
-                        used_mapping = {
-                            "ozn": 0,
-                            "diameter": 4,
-                            "lg": 5,
-                            "n":7,
-                            "lgn": 8
-                        }
+            cell_text = lambda bbox: page.crop(bbox).extract_text()
+
+        for table_idx, table in enumerate(tables):
+            plan = None
+            for row_idx, row in enumerate(table.rows):
+                cell_texts = [
+                    cell_text(self.clamp_bbox(cell, page)) if cell else ""
+                    for cell in row.cells
+                ]
+
+                # The header row fixes the column plan for the whole table
+                if plan is None:
+                    plan = self.table_column_plan(table, cell_texts)
+
+                # 🛑 STOP parsing more rows if this row contains the stop keyword
+                row_text = " ".join(filter(None, cell_texts)).lower()
+
+                if ("mreže - specifikacija" or "mreže - rekapitulacija" or "šipke - rekapitulacija") in row_text:
+                    break  # stop parsing rows for this page
+
+                mapped_row = {}
+                for field_name, idx in plan:
+                    if idx is not None and row.cells[idx]:
+                        value = cell_texts[idx].replace(',', '.')
+                        value = self.clean_number(f"{value}")
                     else:
-                        used_mapping = self.field_mapping
-
-                    mapped_row = {}
-                    for field_name, idx in used_mapping.items():
-                        if idx < len(row.cells):
-                            bbox = row.cells[idx]
-                            if bbox:
-                                value = page.crop(self.clamp_bbox(bbox, page)).extract_text().replace(',', '.')
-                                # print(value, "My idx " + str(idx) + " " + field_name)
-                                value = self.clean_number(f"{value}")
-                            else:
-                                value = None
-                        else:
-                            value = None
-                        mapped_row[field_name] = value
-
-                    none_count = sum(1 for v in mapped_row.values() if v is None)
-                    if none_count < 2:
-                        self.rows.append(mapped_row)
-
+                        value = None
+                    mapped_row[field_name] = value
+
+                none_count = sum(1 for v in mapped_row.values() if v is None)
+                if none_count < 2:
+                    rows.append(mapped_row)
+
+        return rows
+
+    def iter_page_rows(self):
+        page_cache = self.get_page_cache()
+        for page_num, analysis in page_cache:
+            rows = self.cached_pages.rows(page_num) if self.cached_pages is not None else None
+            if rows is None:
+                rows = self.extract_page_rows(analysis)
+                if self.cached_pages is not None:
+                    self.cached_pages.record_rows(page_num, rows)
+            if self.release_pages:
+                page_cache.release(page_num)
+            yield page_num, rows
+
+    def close(self):
+        # Only a document this extractor opened itself; a shared one belongs to the caller
+        if self.owns_pdf and self.pdf is not None:
+            self.pdf.close()
+            self.pdf = None
+            self.page_cache = None
+            self.owns_pdf = False
 
+    def extract(self):
+        for page_num, rows in self.iter_page_rows():
+            self.rows.extend(rows)
 
     def to_json(self):
         return self.rows
 
     def run(self):
-        self.extract()
+        try:
+            self.extract()
+        finally:
+            self.close()
         return self.to_json()
 
 # Example usage
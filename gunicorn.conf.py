@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+#
+# Production profile: the app, pdfplumber/pdfminer, PIL and pypdfium2 are
+# imported once in the master and warmed up on the bundled PDF, then workers
+# are forked from it. Each worker admits EXTRACT_CONCURRENCY extractions at a
+# time and answers the rest with 429, so a burst cannot push it into OOM.
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+# Extraction slots plus headroom for health checks, shape downloads and job polling
+threads = int(os.environ.get("GUNICORN_THREADS", int(os.environ.get("EXTRACT_CONCURRENCY", 2)) + 4))
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then; long-lived PDF parsing fragments the heap
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 500))
+max_requests_jitter = 50
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def when_ready(server):
+    from app import app
+    from helpers.extract.services.warmup import warm_up
+
+    if warm_up(app):
+        server.log.info("Extraction pipeline warmed up")
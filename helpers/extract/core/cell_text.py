@@ -0,0 +1,45 @@
+# helpers/extract/core/cell_text.py
+
+from bisect import bisect_left, bisect_right
+
+from pdfplumber.page import test_proposed_bbox
+from pdfplumber.utils import chars_to_textmap, clip_obj
+
+
+class CellTextIndex:
+    """Answers page.crop(bbox).extract_text() for many cells from one pass over the page chars."""
+
+    def __init__(self, page, chars):
+        self.page = page
+        self.chars = chars
+        self._order = sorted(range(len(chars)), key=lambda i: chars[i]["top"])
+        self._tops = [chars[i]["top"] for i in self._order]
+        self._max_height = max((c["bottom"] - c["top"] for c in chars), default=0)
+        self._texts = {}
+
+    def chars_in(self, bbox):
+        x0, top, x1, bottom = bbox
+        lo = bisect_left(self._tops, top - self._max_height - 1)
+        hi = bisect_right(self._tops, bottom)
+        candidates = sorted(
+            i for i in self._order[lo:hi]
+            if self.chars[i]["x0"] <= x1 and self.chars[i]["x1"] >= x0
+        )
+        return [
+            clipped for clipped in (clip_obj(self.chars[i], bbox) for i in candidates)
+            if clipped is not None
+        ]
+
+    def text(self, bbox):
+        bbox = tuple(bbox)
+        if bbox not in self._texts:
+            # Keep the same validation page.crop() applies to the bbox
+            test_proposed_bbox(bbox, self.page.bbox)
+            textmap = chars_to_textmap(
+                self.chars_in(bbox),
+                layout_bbox=bbox,
+                layout_width=bbox[2] - bbox[0],
+                layout_height=bbox[3] - bbox[1]
+            )
+            self._texts[bbox] = textmap.as_string
+        return self._texts[bbox]
@@ -6,8 +6,10 @@ import time
 from PIL import ImageDraw
 
 from .page_extraction import run_page_extraction
+from .page_analysis import PageAnalysisCache
+from .diagnostics import DiagnosticsBundle
 
-def extract_shapes_and_images(app, pdf, extracted_data, indicator_texts):
+def extract_shapes_and_images(app, pdf, extracted_data, indicator_texts, page_cache=None):
     if app.config.get('TESTING'):
         timestamp = "test_timestamp"
     else:
@@ -19,15 +21,22 @@ def extract_shapes_and_images(app, pdf, extracted_data, indicator_texts):
     final_payload = []
     position_group_map = {}
 
-    for page_num, page_obj in enumerate(pdf.pages):
-        page_text = page_obj.extract_text() or ""
-        if not any(indicator.lower() in page_text.lower() for indicator in indicator_texts):
+    if page_cache is None:
+        page_cache = PageAnalysisCache(pdf, indicator_texts)
+
+    diagnostics = bool(app.config.get("EXTRACT_DIAGNOSTICS"))
+    bundle = DiagnosticsBundle(os.path.join(app.config.get('EXTRACTED_SHAPES_FOLDER', 'extracted_shapes'), str(timestamp)))
+
+    for page_num, analysis in page_cache:
+        if not analysis.contains_indicator:
             continue
 
+        page_obj = analysis.page
+
         page_width_pdf = page_obj.width
         page_height_pdf = page_obj.height
 
-        tables_on_page = page_obj.find_tables(table_settings={"vertical_strategy": "lines", "horizontal_strategy": "lines"})
+        tables_on_page = analysis.tables
         if not tables_on_page:
             continue
 
@@ -61,6 +70,7 @@ def extract_shapes_and_images(app, pdf, extracted_data, indicator_texts):
 
         exec_globals = {
             "page_obj": page_obj,
+            "page_analysis": analysis,
             "table": current_table,
             "pil_image_obj": pil_image_obj,
             "image_draw_context": image_draw_context,
@@ -82,10 +92,12 @@ def extract_shapes_and_images(app, pdf, extracted_data, indicator_texts):
             "extracted_data": extracted_data,
             "app": app,
             "page_num": page_num,
-            "debug_bbox_dump": True
+            "diagnostics": [] if diagnostics else None
         }
 
-        run_page_extraction(exec_globals)
+        page_result = run_page_extraction(exec_globals)
+        if diagnostics:
+            bundle.write(page_result["diagnostics"])
 
         current_page_position_text = exec_globals["current_page_position_text"]
         current_page_position_order = exec_globals["current_page_position_order"]
@@ -96,4 +108,5 @@ def extract_shapes_and_images(app, pdf, extracted_data, indicator_texts):
         except Exception as e:
             app.logger.error(f"Failed to save preview image for page {page_num}: {e}")
 
+    bundle.close()
     return final_payload
@@ -0,0 +1,56 @@
+# helpers/extract/core/diagnostics.py
+
+import gzip
+import json
+import os
+
+DIAGNOSTICS_FILENAME = "diagnostics.ndjson.gz"
+_TRUTHY = ("1", "true", "yes", "on")
+
+
+def request_flag(request, name):
+    """True/False from a query arg or form field, None when the request does not set it."""
+    value = request.args.get(name) or request.form.get(name)
+    if value is None:
+        return None
+    return value.lower() in _TRUTHY
+
+
+def diagnostics_requested(app, request=None):
+    if request is not None:
+        requested = request_flag(request, "diagnostics")
+        if requested is not None:
+            return requested
+    return bool(app.config.get("EXTRACT_DIAGNOSTICS"))
+
+
+class DiagnosticsBundle:
+    """One gzip NDJSON file per document holding the per-cell bbox records.
+
+    The file is only created once the first record arrives, so a document
+    without shape cells leaves nothing behind.
+    """
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, DIAGNOSTICS_FILENAME)
+        self._file = None
+
+    def write(self, records):
+        if not records:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,142 @@
+# helpers/extract/core/image_writer.py
+
+import contextvars
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.extract.core.metrics import IMAGES_WRITTEN, stage
+
+DEFAULT_IMAGE_SETTINGS = {
+    "format": "png",
+    "mode": "rgb",
+    "png_compress_level": None,
+    "webp_quality": 80,
+    "webp_lossless": True
+}
+
+
+def image_output_settings(app):
+    return {
+        "format": app.config.get("SHAPE_IMAGE_FORMAT", "png"),
+        "mode": app.config.get("SHAPE_IMAGE_MODE", "rgb"),
+        "png_compress_level": app.config.get("SHAPE_PNG_COMPRESS_LEVEL"),
+        "webp_quality": app.config.get("SHAPE_WEBP_QUALITY", 80),
+        "webp_lossless": app.config.get("SHAPE_WEBP_LOSSLESS", True)
+    }
+
+
+def image_extension(settings):
+    return "webp" if settings["format"] == "webp" else "png"
+
+
+def prepare_shape_image(image, settings):
+    # Shape crops are black line art on white, so they lose nothing in L or 1-bit
+    if settings["mode"] == "grey":
+        return image.convert("L")
+    if settings["mode"] == "1bit":
+        from PIL import Image
+
+        return image.convert("L").convert("1", dither=Image.Dither.NONE)
+    return image
+
+
+def write_image(image, path, settings, atomic=False):
+    if settings["format"] == "webp":
+        params = { "format": "WEBP", "quality": settings["webp_quality"], "lossless": settings["webp_lossless"] }
+    else:
+        params = { "format": "PNG" }
+        if settings["png_compress_level"] is not None:
+            params["compress_level"] = settings["png_compress_level"]
+
+    with stage("encode"):
+        buffer = io.BytesIO()
+        image.save(buffer, **params)
+
+    with stage("write"):
+        if not atomic:
+            with open(path, "wb") as f:
+                f.write(buffer.getbuffer())
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(buffer.getbuffer())
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    IMAGES_WRITTEN.inc()
+
+
+class ImageWriteBatch:
+    """Write-behind encoding of one document's images on a shared thread pool.
+
+    write() returns as soon as the image is queued; at most max_pending
+    images of the batch are held in memory at once. wait() blocks until
+    everything queued so far is on disk and returns the number of failures;
+    their paths collect in failed_paths.
+    """
+
+    def __init__(self, executor, settings, max_pending, logger):
+        self.executor = executor
+        self.settings = settings
+        self.logger = logger
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures = []
+        self.failed_paths = []
+
+    def write(self, image, path, atomic=False, on_done=None):
+        """Queues the image; on_done, if given, runs once the write has finished or failed."""
+        if self.executor is None:
+            try:
+                write_image(image, path, self.settings, atomic)
+            finally:
+                if on_done is not None:
+                    on_done()
+            return
+        self._slots.acquire()
+        # Run in the caller's context so the encode time lands in its Server-Timing
+        future = self.executor.submit(
+            contextvars.copy_context().run, write_image, image, path, self.settings, atomic
+        )
+        future.add_done_callback(lambda _: self._slots.release())
+        if on_done is not None:
+            future.add_done_callback(lambda _: on_done())
+        self._futures.append((future, path))
+
+    def wait(self):
+        futures, self._futures = self._futures, []
+        failed = 0
+        for future, path in futures:
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.error(f"Failed to write image to {path}: {e}")
+                self.failed_paths.append(path)
+                failed += 1
+        return failed
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def new_image_batch(app):
+    global _executor
+    workers = int(app.config.get("IMAGE_WRITER_WORKERS") or 0)
+    executor = None
+    if workers > 0:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-writer")
+            executor = _executor
+    return ImageWriteBatch(
+        executor,
+        image_output_settings(app),
+        app.config.get("IMAGE_WRITER_MAX_PENDING", 32),
+        app.logger
+    )
@@ -0,0 +1,51 @@
+# helpers/extract/core/indicator_matcher.py
+
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+_SEPARATORS = re.compile(r"[\s\-\u2010-\u2015_]+")
+
+
+def normalize_text(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SEPARATORS.sub("", stripped.casefold())
+
+
+class IndicatorMatcher:
+    """Matches indicator texts ignoring case, diacritics, hyphens and whitespace.
+
+    "Šipke - specifikacija", "šipke-Specifikacija" and "Sipke specifikacija"
+    all normalize to the same needle, so the variant lists collapse to one
+    alternation that is searched once per page.
+    """
+
+    def __init__(self, indicator_texts):
+        self.needles = sorted({normalize_text(text) for text in indicator_texts} - {""}, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(needle) for needle in self.needles)) if self.needles else None
+        self._needle_counts = [Counter(needle) for needle in self.needles]
+
+    def matches(self, text):
+        if self.pattern is None or not text:
+            return False
+        return self.pattern.search(normalize_text(text)) is not None
+
+    def find_all(self, text):
+        if self.pattern is None or not text:
+            return []
+        return sorted({match.group(0) for match in self.pattern.finditer(normalize_text(text))})
+
+    def could_match_chars(self, chars):
+        # Layout text only adds whitespace to the page chars, so a page whose
+        # chars cannot spell any needle can never match the full text either.
+        if self.pattern is None:
+            return False
+        available = Counter(normalize_text("".join(c.get("text", "") for c in chars)))
+        return any(needle_count <= available for needle_count in self._needle_counts)
+
+
+@lru_cache(maxsize=32)
+def get_indicator_matcher(indicator_texts):
+    return IndicatorMatcher(indicator_texts)
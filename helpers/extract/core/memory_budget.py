@@ -0,0 +1,48 @@
+# helpers/extract/core/memory_budget.py
+
+import os
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None  # not Linux: budgets are not enforced
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryBudget:
+    """Fails a request once the process RSS has grown by more than limit_bytes since it started.
+
+    RSS is per process, so with concurrent requests in one worker the growth
+    of all of them counts against whichever request checks first.
+    """
+
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.start_bytes = current_rss_bytes()
+
+    def used_bytes(self):
+        current = current_rss_bytes()
+        if current is None or self.start_bytes is None:
+            return 0
+        return current - self.start_bytes
+
+    def check(self, page_num=None):
+        if not self.limit_bytes:
+            return
+        used = self.used_bytes()
+        if used > self.limit_bytes:
+            where = f" at page {page_num + 1}" if page_num is not None else ""
+            raise MemoryBudgetExceeded(
+                f"Extraction used {used // (1024 * 1024)} MB{where}, over the {self.limit_bytes // (1024 * 1024)} MB budget"
+            )
+
+
+def memory_budget(app):
+    return MemoryBudget(int(app.config.get("MEMORY_BUDGET_MB") or 0) * 1024 * 1024)
@@ -0,0 +1,192 @@
+# helpers/extract/core/metrics.py
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = { "counts": [0] * len(self.buckets), "sum": 0.0, "count": 0 }
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "extract_http_request_duration_seconds", "Request latency by endpoint.",
+    labelnames=("method", "endpoint", "status")
+)
+STAGE_SECONDS = Histogram(
+    "extract_stage_duration_seconds", "Time spent in each extraction pipeline stage.",
+    labelnames=("stage",)
+)
+PAGES_SCANNED = Counter("extract_pages_scanned_total", "Pages checked for an indicator text.")
+PAGES_MATCHED = Counter("extract_pages_matched_total", "Pages that contained an indicator text.")
+ROWS_EXTRACTED = Counter("extract_rows_total", "Numeric table rows parsed.")
+IMAGES_WRITTEN = Counter("extract_images_total", "Shape crops and previews encoded and written.")
+
+METRICS = (REQUEST_SECONDS, STAGE_SECONDS, PAGES_SCANNED, PAGES_MATCHED, ROWS_EXTRACTED, IMAGES_WRITTEN)
+
+# Stage timings of the request being served, for its Server-Timing header
+_request_timings = ContextVar("extract_request_timings", default=None)
+
+
+def observe_stage(stage_name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage_name)
+
+
+def _enter_stage(timings, stage_name, now):
+    with timings["lock"]:
+        active = timings["active"].get(stage_name, 0)
+        if not active:
+            timings["since"][stage_name] = now
+        timings["active"][stage_name] = active + 1
+
+
+def _exit_stage(timings, stage_name, now, seconds):
+    with timings["lock"]:
+        timings["summed"][stage_name] = timings["summed"].get(stage_name, 0.0) + seconds
+        timings["active"][stage_name] -= 1
+        if not timings["active"][stage_name]:
+            wall = now - timings["since"].pop(stage_name)
+            timings["wall"][stage_name] = timings["wall"].get(stage_name, 0.0) + wall
+
+
+@contextmanager
+def stage(stage_name):
+    timings = _request_timings.get()
+    start = time.perf_counter()
+    if timings is not None:
+        _enter_stage(timings, stage_name, start)
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        observe_stage(stage_name, end - start)
+        if timings is not None:
+            _exit_stage(timings, stage_name, end, end - start)
+
+
+def start_request_timings():
+    _request_timings.set({
+        "wall": {},
+        "summed": {},
+        "active": {},
+        "since": {},
+        "lock": threading.Lock(),
+        "start": time.perf_counter()
+    })
+
+
+def server_timing_header():
+    """Wall time per stage, so no stage exceeds the total.
+
+    Write-behind stages run on several threads at once; their time summed
+    across threads goes in a separate <stage>-cpu entry when it differs.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        return None
+    now = time.perf_counter()
+    entries = []
+    with timings["lock"]:
+        for name, summed in timings["summed"].items():
+            wall = timings["wall"].get(name, 0.0)
+            if name in timings["since"]:
+                wall += now - timings["since"][name]
+            entries.append(f"{name};dur={wall * 1000:.1f}")
+            if summed - wall > 0.0001:
+                entries.append(f'{name}-cpu;dur={summed * 1000:.1f};desc="{name} summed across threads"')
+    entries.append(f"total;dur={(now - timings['start']) * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.clear()
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
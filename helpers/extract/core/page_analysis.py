@@ -0,0 +1,95 @@
+# helpers/extract/core/page_analysis.py
+
+from functools import cached_property
+
+from helpers.extract.core.indicator_matcher import get_indicator_matcher
+from helpers.extract.core.metrics import PAGES_MATCHED, PAGES_SCANNED, stage
+from helpers.extract.core.page_ranges import check_page_count
+
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines"
+}
+
+
+class PageAnalysis:
+    def __init__(self, page, matcher):
+        self.page = page
+        self.matcher = matcher
+
+    @cached_property
+    def text(self):
+        return self.page.extract_text() or ""
+
+    @cached_property
+    def contains_indicator(self):
+        PAGES_SCANNED.inc()
+        with stage("indicator_scan"):
+            # Reject plan pages from their raw chars before paying for layout text
+            found = self.matcher.could_match_chars(self.chars) and self.matcher.matches(self.text)
+        if found:
+            PAGES_MATCHED.inc()
+        return found
+
+    @cached_property
+    def tables(self):
+        with stage("table_detection"):
+            return self.page.find_tables(table_settings=TABLE_SETTINGS)
+
+    @cached_property
+    def words(self):
+        return self.page.extract_words()
+
+    @cached_property
+    def chars(self):
+        return self.page.chars
+
+    def release(self):
+        # Keep the indicator verdict; anything heavier is rebuilt if asked for again
+        for name in ("text", "tables", "words", "chars"):
+            self.__dict__.pop(name, None)
+        self.page.close()
+
+
+class PageAnalysisCache:
+    """Per-document cache so every stage of a request parses each page only once."""
+
+    def __init__(self, pdf, indicator_texts, page_nums=None):
+        self.pdf = pdf
+        self.indicator_texts = indicator_texts
+        self.matcher = get_indicator_matcher(tuple(indicator_texts))
+        # Pages the request selected; iteration visits only these
+        if page_nums is not None:
+            check_page_count(page_nums, len(pdf.pages))
+        self.page_nums = list(page_nums) if page_nums is not None else list(range(len(pdf.pages)))
+        self._pages = {}
+
+    def get(self, page_num):
+        analysis = self._pages.get(page_num)
+        if analysis is None:
+            analysis = PageAnalysis(self.pdf.pages[page_num], self.matcher)
+            self._pages[page_num] = analysis
+        return analysis
+
+    def has_indicator_verdict(self, page_num):
+        analysis = self._pages.get(page_num)
+        return analysis is not None and "contains_indicator" in analysis.__dict__
+
+    def record_indicator(self, page_num, found):
+        # A verdict reached elsewhere (a pool process) stands in for scanning here
+        PAGES_SCANNED.inc()
+        if found:
+            PAGES_MATCHED.inc()
+        self.get(page_num).__dict__["contains_indicator"] = found
+
+    def release(self, page_num):
+        analysis = self._pages.get(page_num)
+        if analysis is not None:
+            analysis.release()
+
+    def __len__(self):
+        return len(self.page_nums)
+
+    def __iter__(self):
+        for page_num in self.page_nums:
+            yield page_num, self.get(page_num)
@@ -1,16 +1,87 @@
 import os
-import json
 from PIL import ImageDraw
 
+import numpy as np
+
 from helpers.extract.core.scaling_utils import (
-    scale_visual_bbox,
-    scale_word_bbox
+    scale_visual_bboxes,
+    scale_word_bboxes
+)
+from helpers.extract.core.spatial_index import BBoxIndex
+from helpers.extract.core.image_writer import (
+    DEFAULT_IMAGE_SETTINGS,
+    image_extension,
+    prepare_shape_image,
+    write_image
 )
 
+def build_object_index(page_obj, analysis, app, page_num, x_scale, y_scale, width_pdf, height_pdf, width_img, height_img):
+    boxes = []
+    records = []
+    for obj_type in ["line", "rect", "curve"]:
+        objs = page_obj.objects.get(obj_type, [])
+        if not objs:
+            continue
+        scaled = scale_visual_bboxes(objs, x_scale, y_scale, height_img)
+        keep = ~(((scaled[:, 2] - scaled[:, 0]) <= 1) & ((scaled[:, 3] - scaled[:, 1]) <= 1))
+        boxes.append(scaled[keep])
+        records.extend((f'visual:{obj_type}', int(idx), objs[idx]) for idx in np.flatnonzero(keep))
+
+    words, word_boxes = [], None
+    try:
+        words = analysis.words if analysis is not None else page_obj.extract_words()
+        word_boxes = scale_word_bboxes(words, width_pdf, height_pdf, width_img, height_img)
+    except Exception as e:
+        app.logger.warning(f"[page {page_num}] Failed to extract words: {e}")
+
+    if word_boxes is not None and len(word_boxes):
+        boxes.append(word_boxes)
+        records.extend(('word', idx, w) for idx, w in enumerate(words))
+
+    return BBoxIndex(np.concatenate(boxes) if boxes else np.empty((0, 4)), records)
+
+def describe_object(object_index, i):
+    source, idx, obj = object_index.records[i]
+    x0, y0, x1, y1 = object_index.bbox(i)
+    if source == 'word':
+        text = obj.get('text')
+        pdf_bbox = [obj.get('x0'), obj.get('top'), obj.get('x1'), obj.get('bottom')]
+    else:
+        text = None
+        pdf_bbox = [
+            min(obj.get('x0', 0), obj.get('x1', 0)),
+            min(obj.get('y0', 0), obj.get('y1', 0)),
+            max(obj.get('x0', 0), obj.get('x1', 0)),
+            max(obj.get('y0', 0), obj.get('y1', 0))
+        ]
+    return {
+        "source": source,
+        "index": idx,
+        "text": text,
+        "bbox": [x0, y0, x1, y1],
+        "pdf_bbox": pdf_bbox,
+        "width": (x1 - x0),
+        "height": (y1 - y0)
+    }
+
 def run_page_extraction(g):
+    page_result = collect_page_images(g)
+    merge_page_result(g, page_result)
+    return page_result
+
+def collect_page_images(g):
+    """Crop the shape cells of one page.
+
+    Positions are tracked relative to the page: an image seen before the page's
+    first position row has "position" None, and "order_offset" counts the
+    position rows passed so far. merge_page_result() resolves both against the
+    state carried over from the previous pages. When g["diagnostics"] is a
+    list, one bbox record per shape cell is appended to it.
+    """
     page_obj = g["page_obj"]
     table = g["table"]
     image = g["pil_image_obj"]
+    origin_x, origin_y = g.get("image_origin", (0, 0))
     draw = g["image_draw_context"]
     width_pdf = g["page_width_pdf"]
     height_pdf = g["page_height_pdf"]
@@ -21,55 +92,21 @@ def run_page_extraction(g):
     row_heights = g["row_first_cell_heights"]
     folder = g["page_folder"]
     timestamp = g["timestamp"]
-    position_text = g["current_page_position_text"]
-    position_order = g["current_page_position_order"]
-    global_data_index = g["global_data_index"]
-    extracted_data = g["extracted_data"]
-    position_group_map = g["position_group_map"]
-    final_payload = g["final_payload"]
+    position_text = None
+    position_order = 0
     images_collected = g["images_collected_for_page"]
     app = g["app"]
     page_num = g["page_num"]
-    debug_bbox_dump = g.get("debug_bbox_dump", False)
+    diagnostics = g.get("diagnostics")
+    analysis = g.get("page_analysis")
+    shape_store = g.get("shape_store")
+    image_writer = g.get("image_writer")
+    image_settings = image_writer.settings if image_writer is not None else DEFAULT_IMAGE_SETTINGS
 
     x_scale = width_img / width_pdf
     y_scale = height_img / height_pdf
 
-    visual_objects = []
-    for obj_type in ["line", "rect", "curve"]:
-        for idx, obj in enumerate(page_obj.objects.get(obj_type, [])):
-            bbox = scale_visual_bbox(obj, x_scale, y_scale, height_img)
-            width_px = bbox["x1"] - bbox["x0"]
-            height_px = bbox["y1"] - bbox["y0"]
-            if width_px <= 1 and height_px <= 1:
-                continue
-            bbox['source'] = f'visual:{obj_type}'
-            bbox['index'] = idx
-            bbox['pdf_x0'] = min(obj.get('x0', 0), obj.get('x1', 0))
-            bbox['pdf_x1'] = max(obj.get('x0', 0), obj.get('x1', 0))
-            bbox['pdf_y0'] = min(obj.get('y0', 0), obj.get('y1', 0))
-            bbox['pdf_y1'] = max(obj.get('y0', 0), obj.get('y1', 0))
-            bbox['width'] = width_px
-            bbox['height'] = height_px
-            visual_objects.append(bbox)
-
-    try:
-        word_objects = []
-        for idx, w in enumerate(page_obj.extract_words()):
-            bbox = scale_word_bbox(w, width_pdf, height_pdf, width_img, height_img)
-            bbox['source'] = 'word'
-            bbox['index'] = idx
-            bbox['text'] = w.get('text')
-            bbox['pdf_x0'] = w.get('x0')
-            bbox['pdf_x1'] = w.get('x1')
-            bbox['pdf_y0'] = w.get('top')
-            bbox['pdf_y1'] = w.get('bottom')
-            word_objects.append(bbox)
-    except Exception as e:
-        app.logger.warning(f"[page {page_num}] Failed to extract words: {e}")
-        word_objects = []
-
-    all_objects = visual_objects + word_objects
+    object_index = build_object_index(page_obj, analysis, app, page_num, x_scale, y_scale, width_pdf, height_pdf, width_img, height_img)
 
     for row_index, row_obj in enumerate(table.rows):
         for cell_index, cell_coords in enumerate(row_obj.cells):
@@ -120,25 +157,19 @@ def run_page_extraction(g):
                 if extracted_text:
                     position_text = extracted_text.strip()
                     position_order += 1
-                    draw.rectangle([scaled_x0, scaled_y0, scaled_x1, scaled_y1], outline="green", width=1)
+                    if draw is not None:
+                        draw.rectangle([scaled_x0, scaled_y0, scaled_x1, scaled_y1], outline="green", width=1)
 
             if cell_index == 1 and row_index != 1:
-                content_objects = [
-                    obj for obj in all_objects
-                    if obj["x0"] >= scaled_x0 and obj["x1"] <= scaled_x1
-                    and obj["y0"] >= scaled_y0 and obj["y1"] <= scaled_y1
-                ]
+                content_objects = object_index.contained_in(scaled_x0, scaled_y0, scaled_x1, scaled_y1)
 
                 scaled_crop_x0 = scaled_x0
                 scaled_crop_y0 = scaled_y0
                 scaled_crop_x1 = scaled_x1
                 scaled_crop_y1 = scaled_y1
 
-                if content_objects:
-                    obj_x0 = min(obj["x0"] for obj in content_objects)
-                    obj_y0 = min(obj["y0"] for obj in content_objects)
-                    obj_x1 = max(obj["x1"] for obj in content_objects)
-                    obj_y1 = max(obj["y1"] for obj in content_objects)
+                if len(content_objects):
+                    obj_x0, obj_y0, obj_x1, obj_y1 = object_index.extent(content_objects)
 
                     pad_x = 0
                     pad_y = 0
@@ -147,24 +178,12 @@ def run_page_extraction(g):
                     scaled_crop_x1 = min(width_img, obj_x1 + pad_x)
                     scaled_crop_y1 = max(scaled_y1, min(height_img, obj_y1 + pad_y))
 
-                    if debug_bbox_dump:
-                        sorted_objects = sorted(content_objects, key=lambda o: (o["x0"], o["y0"]))
-                        serialized_objects = []
-                        visual_serialized = []
-                        for item in sorted_objects:
-                            obj_data = {
-                                "source": item.get("source"),
-                                "index": item.get("index"),
-                                "text": item.get("text"),
-                                "bbox": [item["x0"], item["y0"], item["x1"], item["y1"]],
-                                "pdf_bbox": [item.get("pdf_x0"), item.get("pdf_y0"), item.get("pdf_x1"), item.get("pdf_y1")],
-                                "width": (item["x1"] - item["x0"]),
-                                "height": (item["y1"] - item["y0"])
-                            }
-                            serialized_objects.append(obj_data)
-                            if str(item.get("source", "")).startswith("visual"):
-                                visual_serialized.append(obj_data)
-                        debug_payload = {
+                    if diagnostics is not None:
+                        serialized_objects = sorted(
+                            (describe_object(object_index, i) for i in content_objects),
+                            key=lambda o: (o["bbox"][0], o["bbox"][1])
+                        )
+                        diagnostics.append({
                             "page": page_num,
                             "row_index": row_index,
                             "cell_index": cell_index,
@@ -174,24 +193,20 @@ def run_page_extraction(g):
                             "max_object_x1": obj_x1,
                             "left_gap_pixels": scaled_crop_x0 - obj_x0,
                             "objects": serialized_objects,
-                            "visual_objects_in_cell": visual_serialized,
+                            "visual_objects_in_cell": [
+                                obj_data for obj_data in serialized_objects
+                                if str(obj_data.get("source", "")).startswith("visual")
+                            ],
                             "cell_inset_x": inset_x,
                             "cell_inset_y": inset_y,
                             "pad_x": pad_x,
                             "pad_y": pad_y,
                             "scaled_cell_x0": scaled_x0,
                             "scaled_cell_x1": scaled_x1
-                        }
-                        debug_filename = f"page_{page_num}_row_{row_index}_cell_{cell_index}_debug.json"
-                        debug_path = os.path.join(folder, debug_filename)
-                        try:
-                            with open(debug_path, 'w', encoding='utf-8') as debug_file:
-                                json.dump(debug_payload, debug_file, indent=2)
-                        except Exception as err:
-                            app.logger.warning(f'[page {page_num}] Failed to write bbox debug data for row {row_index}, cell {cell_index}: {err}')
-
-                elif debug_bbox_dump:
-                    debug_payload = {
+                        })
+
+                elif diagnostics is not None:
+                    diagnostics.append({
                         "page": page_num,
                         "row_index": row_index,
                         "cell_index": cell_index,
@@ -208,35 +223,61 @@ def run_page_extraction(g):
                         "pad_y": 0,
                         "scaled_cell_x0": scaled_x0,
                         "scaled_cell_x1": scaled_x1
-                    }
-                    debug_filename = f"page_{page_num}_row_{row_index}_cell_{cell_index}_debug.json"
-                    debug_path = os.path.join(folder, debug_filename)
-                    try:
-                        with open(debug_path, 'w', encoding='utf-8') as debug_file:
-                            json.dump(debug_payload, debug_file, indent=2)
-                    except Exception as err:
-                        app.logger.warning(f'[page {page_num}] Failed to write bbox debug data for row {row_index}, cell {cell_index}: {err}')
+                    })
 
-                cropped = image.crop((scaled_crop_x0, scaled_crop_y0, scaled_crop_x1, scaled_crop_y1))
+                cropped = prepare_shape_image(image.crop((
+                    scaled_crop_x0 - origin_x, scaled_crop_y0 - origin_y,
+                    scaled_crop_x1 - origin_x, scaled_crop_y1 - origin_y
+                )), image_settings)
 
-                filename = f"page_{page_num}_row_{row_index}_cell_1.png"
-                full_path = os.path.join(folder, filename)
-                try:
-                    cropped.save(full_path)
-                except Exception as e:
-                    app.logger.error(f"Failed to save cropped shape to {full_path}: {e}")
-                    continue
+                if shape_store is not None:
+                    try:
+                        img_url = shape_store.save(cropped, image_writer, image_settings)
+                    except Exception as e:
+                        app.logger.error(f"Failed to store cropped shape for page {page_num}, row {row_index}: {e}")
+                        continue
+                else:
+                    filename = f"page_{page_num}_row_{row_index}_cell_1.{image_extension(image_settings)}"
+                    full_path = os.path.join(folder, filename)
+                    try:
+                        if image_writer is not None:
+                            image_writer.write(cropped, full_path)
+                        else:
+                            write_image(cropped, full_path, image_settings)
+                    except Exception as e:
+                        app.logger.error(f"Failed to save cropped shape to {full_path}: {e}")
+                        continue
+
+                    img_url = os.path.join(str(timestamp), filename).replace("\\", "/")
 
-                img_url = os.path.join(str(timestamp), filename).replace("\\", "/")
                 images_collected.append({
                     "position": position_text,
                     "img_path_segment": img_url,
-                    "order": max(position_order, 0)
+                    "order_offset": position_order
                 })
 
-                draw.rectangle([scaled_x0, scaled_y0, scaled_x1, scaled_y1], outline="red", width=1)
+                if draw is not None:
+                    draw.rectangle([scaled_x0, scaled_y0, scaled_x1, scaled_y1], outline="red", width=1)
+
+    return {
+        "page_num": page_num,
+        "images": images_collected,
+        "position_text": position_text,
+        "position_increments": position_order,
+        "diagnostics": diagnostics
+    }
 
-    for img in images_collected:
+def merge_page_result(g, page_result):
+    position_text = g["current_page_position_text"]
+    position_order = g["current_page_position_order"]
+    global_data_index = g["global_data_index"]
+    extracted_data = g["extracted_data"]
+    position_group_map = g["position_group_map"]
+    final_payload = g["final_payload"]
+    app = g["app"]
+    added_rows = []
+
+    for img in page_result["images"]:
         if global_data_index >= len(extracted_data):
             app.logger.warning(f"Data index exceeded: {global_data_index}/{len(extracted_data)}")
             break
@@ -256,8 +297,8 @@ def run_page_extraction(g):
         if row["diameter"] == 0 and row["lg"] == 0 and row["lgn"] == 0 and row["n"] == 0:
             continue
 
-        position = img["position"]
-        order = img["order"]
+        position = img["position"] if img["position"] is not None else position_text
+        order = max(position_order + img["order_offset"], 0)
 
         if position in position_group_map:
             position_group_map[position]["rows"].append(row)
@@ -269,7 +310,13 @@ def run_page_extraction(g):
             }
             final_payload.append(group)
             position_group_map[position] = group
+        added_rows.append((position_group_map[position], row))
+
+    if page_result["position_text"] is not None:
+        position_text = page_result["position_text"]
+    position_order += page_result["position_increments"]
 
     g["current_page_position_text"] = position_text
     g["current_page_position_order"] = position_order
     g["global_data_index"] = global_data_index
+    return added_rows
@@ -0,0 +1,65 @@
+# helpers/extract/core/page_ranges.py
+
+import re
+
+_RANGE = re.compile(r"^(\d+)(?:-(\d+))?$")
+# Ranges are expanded before the document is open; keeps "1-999999999" from doing so
+MAX_PAGE_NUMBER = 10000
+
+
+class PageRangeError(ValueError):
+    pass
+
+
+def check_page_count(page_nums, page_count):
+    if page_nums and max(page_nums) >= page_count:
+        raise PageRangeError(f"Page {max(page_nums) + 1} is past the end of the document ({page_count} pages)")
+
+
+def parse_pages(value, page_count=None):
+    """1-based page ranges such as "1-3,5" as a sorted list of 0-based page numbers.
+
+    Raises PageRangeError on bad syntax or, given page_count, on pages past the end.
+    """
+    page_nums = set()
+    for part in value.replace(" ", "").split(","):
+        if not part:
+            continue
+        match = _RANGE.match(part)
+        if match is None:
+            raise PageRangeError(f"Invalid page range '{part}'")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first or last > MAX_PAGE_NUMBER:
+            raise PageRangeError(f"Invalid page range '{part}'")
+        if page_count is not None:
+            check_page_count([last - 1], page_count)
+        page_nums.update(range(first - 1, last))
+    if not page_nums:
+        raise PageRangeError("No pages selected")
+    return sorted(page_nums)
+
+
+def format_pages(page_nums):
+    """The inverse of parse_pages: 0-based page numbers as compact 1-based ranges."""
+    ranges = []
+    for page_num in sorted(page_nums):
+        if ranges and page_num == ranges[-1][1] + 1:
+            ranges[-1][1] = page_num
+        else:
+            ranges.append([page_num, page_num])
+    return ",".join(
+        str(first + 1) if first == last else f"{first + 1}-{last + 1}"
+        for first, last in ranges
+    )
+
+
+def requested_pages(request, page_count=None):
+    """The request's pages parameter as 0-based page numbers, None for all pages, or a 400 error tuple."""
+    value = request.args.get("pages") or request.form.get("pages")
+    if not value:
+        return None, None
+    try:
+        return parse_pages(value, page_count), None
+    except PageRangeError as e:
+        return None, ({ "error": str(e) }, 400)
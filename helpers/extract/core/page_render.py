@@ -0,0 +1,98 @@
+# helpers/extract/core/page_render.py
+
+import math
+
+import pypdfium2
+from PIL import ImageDraw
+
+RENDER_MARGIN_PX = 4
+
+
+class ScaledDraw:
+    """ImageDraw proxy that maps full-page pixel coordinates onto a scaled or offset image."""
+
+    def __init__(self, image, scale=1, origin=(0, 0)):
+        self.draw = ImageDraw.Draw(image)
+        self.scale = scale
+        self.origin = origin
+
+    def rectangle(self, xy, **kwargs):
+        ox, oy = self.origin
+        x0, y0, x1, y1 = xy
+        self.draw.rectangle([
+            (x0 - ox) * self.scale, (y0 - oy) * self.scale,
+            (x1 - ox) * self.scale, (y1 - oy) * self.scale
+        ], **kwargs)
+
+
+def _render(page_obj, resolution, crop=(0, 0, 0, 0)):
+    pdf = page_obj.pdf
+    if pdf.path:
+        src = pdf.path
+    else:
+        pdf.stream.seek(0)
+        src = pdf.stream
+
+    # Same pdfium flags pdfplumber's to_image() uses, so crops match pixel for pixel
+    pdfium_doc = pypdfium2.PdfDocument(src, password=pdf.password)
+    try:
+        pdfium_page = pdfium_doc.get_page(page_obj.page_number - 1)
+        image = pdfium_page.render(
+            scale=resolution / 72,
+            crop=crop,
+            no_smoothtext=True,
+            no_smoothpath=True,
+            no_smoothimage=True,
+            prefer_bgrx=True
+        ).to_pil()
+    finally:
+        pdfium_doc.close()
+    return image.convert("RGB")
+
+
+def full_page_size(page_obj, resolution):
+    scale = resolution / 72
+    return math.ceil(page_obj.width * scale), math.ceil(page_obj.height * scale)
+
+
+def render_page(page_obj, resolution):
+    return page_obj.to_image(resolution=resolution).original
+
+
+def render_region(page_obj, bbox, resolution):
+    """Rasterize only bbox (pdf x0, top, x1, bottom) of the page.
+
+    Returns the image and its pixel origin within the full-page render. The
+    origin is kept even so PIL's round-half-to-even crop rounding agrees with
+    a crop of the full-page image.
+    """
+    scale = resolution / 72
+    width_px, height_px = full_page_size(page_obj, resolution)
+
+    left = max(0, math.floor(bbox[0] * scale) - RENDER_MARGIN_PX)
+    top = max(0, math.floor(bbox[1] * scale) - RENDER_MARGIN_PX)
+    left -= left % 2
+    top -= top % 2
+    right = min(width_px, math.ceil(bbox[2] * scale) + RENDER_MARGIN_PX)
+    bottom = min(height_px, math.ceil(bbox[3] * scale) + RENDER_MARGIN_PX)
+
+    # pdfium takes the crop in points and rounds it up to whole pixels
+    crop = (
+        (left - 0.5) / scale if left else 0,
+        (height_px - bottom - 0.5) / scale if bottom < height_px else 0,
+        (width_px - right - 0.5) / scale if right < width_px else 0,
+        (top - 0.5) / scale if top else 0
+    )
+    return _render(page_obj, resolution, crop), (left, top)
+
+
+def shape_column_bbox(table):
+    cells = [row.cells[1] for row in table.rows if len(row.cells) > 1 and row.cells[1]]
+    if not cells:
+        return None
+    return (
+        min(cell[0] for cell in cells),
+        min(cell[1] for cell in cells),
+        max(cell[2] for cell in cells),
+        max(cell[3] for cell in cells)
+    )
@@ -1,23 +1,23 @@
-def scale_visual_bbox(obj, x_scale, y_scale, img_height):
-    x0 = obj["x0"] * x_scale
-    x1 = obj["x1"] * x_scale
-    y0 = img_height - (obj["y1"] * y_scale)
-    y1 = img_height - (obj["y0"] * y_scale)
-    return {
-        "x0": min(x0, x1),
-        "x1": max(x0, x1),
-        "y0": min(y0, y1),
-        "y1": max(y0, y1)
-    }
+import numpy as np
 
-def scale_word_bbox(word, width_pdf, height_pdf, width_img, height_img):
-    x0 = (word["x0"] / width_pdf) * width_img
-    x1 = (word["x1"] / width_pdf) * width_img
-    y0 = (word["top"] / height_pdf) * height_img
-    y1 = (word["bottom"] / height_pdf) * height_img
-    return {
-        "x0": x0,
-        "x1": x1,
-        "y0": y0,
-        "y1": y1
-    }
\ No newline at end of file
+def scale_visual_bboxes(objs, x_scale, y_scale, img_height):
+    coords = np.array([(o["x0"], o["y0"], o["x1"], o["y1"]) for o in objs], dtype=np.float64).reshape(-1, 4)
+    x0 = coords[:, 0] * x_scale
+    x1 = coords[:, 2] * x_scale
+    y0 = img_height - (coords[:, 3] * y_scale)
+    y1 = img_height - (coords[:, 1] * y_scale)
+    return np.column_stack((
+        np.minimum(x0, x1),
+        np.minimum(y0, y1),
+        np.maximum(x0, x1),
+        np.maximum(y0, y1)
+    ))
+
+def scale_word_bboxes(words, width_pdf, height_pdf, width_img, height_img):
+    coords = np.array([(w["x0"], w["top"], w["x1"], w["bottom"]) for w in words], dtype=np.float64).reshape(-1, 4)
+    return np.column_stack((
+        (coords[:, 0] / width_pdf) * width_img,
+        (coords[:, 1] / height_pdf) * height_img,
+        (coords[:, 2] / width_pdf) * width_img,
+        (coords[:, 3] / height_pdf) * height_img
+    ))
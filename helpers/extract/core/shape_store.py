@@ -0,0 +1,81 @@
+# helpers/extract/core/shape_store.py
+
+import hashlib
+import os
+import threading
+
+from helpers.extract.core.image_writer import DEFAULT_IMAGE_SETTINGS, image_extension, write_image
+
+SHAPES_SUBFOLDER = "shapes"
+
+
+class ContentAddressedShapeStore:
+    """Writes each distinct shape crop once, named by the hash of its pixels.
+
+    Many bars share a bending shape and dimensions, so across a project most
+    crops are pixel-identical; they all point at the same shared file.
+    """
+
+    def __init__(self, shapes_root):
+        self.folder = os.path.join(shapes_root, SHAPES_SUBFOLDER)
+        # Shapes queued on a write-behind writer and not yet on disk, by filename
+        self._queued = {}
+        self._lock = threading.Lock()
+
+    def image_hash(self, image):
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}:{image.width}x{image.height}:".encode("ascii"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def save(self, image, writer=None, settings=DEFAULT_IMAGE_SETTINGS):
+        filename = f"{self.image_hash(image)}.{image_extension(settings)}"
+        path = os.path.join(self.folder, filename)
+
+        # The file may have been swept since it was last written, so ask the disk every time
+        if self._reuse(path):
+            return f"{SHAPES_SUBFOLDER}/{filename}"
+
+        with self._lock:
+            # Only the writer that queued the shape can vouch for it: its request
+            # waits for that writer before handing out URLs. Other requests write it too.
+            if writer is not None and self._queued.get(filename) is writer:
+                return f"{SHAPES_SUBFOLDER}/{filename}"
+            if writer is not None:
+                self._queued[filename] = writer
+
+        os.makedirs(self.folder, exist_ok=True)
+        # Concurrent writers of the same shape race harmlessly: the
+        # content is identical and the rename is atomic
+        if writer is not None:
+            writer.write(image, path, atomic=True, on_done=lambda: self._written(filename, writer))
+        else:
+            write_image(image, path, settings, atomic=True)
+
+        return f"{SHAPES_SUBFOLDER}/{filename}"
+
+    def _written(self, filename, writer):
+        # Succeeded or failed, from now on the disk is the only record
+        with self._lock:
+            if self._queued.get(filename) is writer:
+                del self._queued[filename]
+
+    def _reuse(self, path):
+        # Touching the file marks it recently used for the storage sweeper's LRU
+        try:
+            os.utime(path)
+        except OSError:
+            return False
+        return True
+
+
+_stores = {}
+
+
+def get_shape_store(app):
+    if app.config.get("SHAPE_STORE", "request") != "content":
+        return None
+    shapes_root = app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes")
+    if shapes_root not in _stores:
+        _stores[shapes_root] = ContentAddressedShapeStore(shapes_root)
+    return _stores[shapes_root]
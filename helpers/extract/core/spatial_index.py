@@ -0,0 +1,36 @@
+# helpers/extract/core/spatial_index.py
+
+import numpy as np
+
+
+class BBoxIndex:
+    """Array-backed index of scaled (x0, y0, x1, y1) boxes, sorted by y0 for containment queries."""
+
+    def __init__(self, boxes, records):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.records = records
+        self._order = np.argsort(self.boxes[:, 1], kind="stable")
+        self._sorted = self.boxes[self._order]
+
+    def __len__(self):
+        return len(self.records)
+
+    def contained_in(self, x0, y0, x1, y1):
+        lo = np.searchsorted(self._sorted[:, 1], y0, side="left")
+        hi = np.searchsorted(self._sorted[:, 1], y1, side="right")
+        window = self._sorted[lo:hi]
+        mask = (window[:, 0] >= x0) & (window[:, 2] <= x1) & (window[:, 3] <= y1)
+        # Hits come back in insertion order, like the list scan they replace
+        return np.sort(self._order[lo:hi][mask])
+
+    def extent(self, indices):
+        hits = self.boxes[indices]
+        return (
+            float(hits[:, 0].min()),
+            float(hits[:, 1].min()),
+            float(hits[:, 2].max()),
+            float(hits[:, 3].max())
+        )
+
+    def bbox(self, i):
+        return [float(v) for v in self.boxes[i]]
@@ -0,0 +1,86 @@
+# helpers/extract/core/table_templates.py
+
+from functools import lru_cache
+
+from helpers.extract.core.indicator_matcher import normalize_text
+
+# Known CAD export layouts. A template matches when every key it sets agrees
+# with the table: "cell_count" is the number of columns pdfplumber found,
+# "header_keywords" must all appear in the normalized header row, and
+# "column_offsets" are the columns' left edges in points from the table's left
+# edge, each within "column_tolerance" (default 2). The first match wins;
+# tables matching none use the extractor's own field_mapping. Add layouts at
+# runtime with register_template(), which drops the cached resolutions.
+DEFAULT_COLUMN_TOLERANCE = 2
+
+TABLE_TEMPLATES = [
+    {
+        "name": "cad-12-columns",
+        "cell_count": 12,
+        "mapping": { "ozn": 0, "diameter": 6, "lg": 8, "n": 10, "lgn": 11 }
+    },
+    {
+        "name": "cad-10-columns",
+        "cell_count": 10,
+        "mapping": { "ozn": 0, "diameter": 3, "lg": 5, "n": 6, "lgn": 8 }
+    },
+    {
+        "name": "cad-16-columns",
+        "cell_count": 16,
+        "mapping": { "ozn": 0, "diameter": 7, "lg": 9, "n": 11, "lgn": 13 }
+    },
+    {
+        "name": "cad-9-columns",
+        "cell_count": 9,
+        "mapping": { "ozn": 0, "diameter": 4, "lg": 5, "n": 7, "lgn": 8 }
+    }
+]
+
+
+def table_fingerprint(table, header_texts):
+    """Layout key of a table: column count, column x offsets and header text.
+
+    pdfplumber gives every row of a table the same cells list, so one
+    fingerprint describes all of its rows.
+    """
+    x_min = table.bbox[0]
+    columns = tuple(sorted({round(cell[0] - x_min) for cell in table.cells}))
+    header = normalize_text(" ".join(filter(None, header_texts)))
+    return len(header_texts), columns, header
+
+
+def template_matches(template, fingerprint):
+    cell_count, columns, header = fingerprint
+    if "cell_count" in template and template["cell_count"] != cell_count:
+        return False
+    if "column_offsets" in template:
+        offsets = template["column_offsets"]
+        tolerance = template.get("column_tolerance", DEFAULT_COLUMN_TOLERANCE)
+        if len(offsets) != len(columns) or any(abs(a - b) > tolerance for a, b in zip(offsets, columns)):
+            return False
+    return all(normalize_text(keyword) in header for keyword in template.get("header_keywords", ()))
+
+
+@lru_cache(maxsize=256)
+def resolve_table_template(fingerprint):
+    for template in TABLE_TEMPLATES:
+        if template_matches(template, fingerprint):
+            return template
+    return None
+
+
+def register_template(template, first=False):
+    """Adds a layout; with first=True it takes precedence over the known ones."""
+    if first:
+        TABLE_TEMPLATES.insert(0, template)
+    else:
+        TABLE_TEMPLATES.append(template)
+    # A table resolved before may match the new layout now
+    resolve_table_template.cache_clear()
+
+
+def column_plan(mapping, cell_count):
+    return tuple(
+        (field_name, idx if idx < cell_count else None)
+        for field_name, idx in mapping.items()
+    )
@@ -0,0 +1,30 @@
+# helpers/routes/extract_export_handler.py
+
+from flask import Response, current_app as app, stream_with_context
+
+from helpers.extract.routes.extract_preview_handler import open_request_pdf_pages
+from helpers.extract.routes.extract_stream_handler import iter_preview_records
+from helpers.extract.services.exports import EXPORT_FORMATS, iter_export_pages
+
+def export_extract_preview(request):
+    export_format = (request.args.get("format") or request.form.get("format") or "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        return { "error": f"Unsupported export format: {export_format}" }, 400
+
+    pdf, selected_pages, error = open_request_pdf_pages(request)
+    if error:
+        return error
+
+    # Rows are written page by page as the extraction advances
+    writer, mimetype = EXPORT_FORMATS[export_format]
+    pages = iter_export_pages(iter_preview_records(app._get_current_object(), pdf, pages=selected_pages))
+
+    return Response(
+        stream_with_context(writer(pages)),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="extraction.{export_format}"',
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
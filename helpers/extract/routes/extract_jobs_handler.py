@@ -0,0 +1,54 @@
+# helpers/routes/extract_jobs_handler.py
+
+import pdfplumber
+from flask import current_app as app
+
+from helpers.extract.routes.extract_preview_handler import run_preview_pipeline
+from helpers.extract.services.job_queue import get_job_runner
+from helpers.extract.services.uploads import request_pdf_upload
+
+def run_preview_job(app, pdf_path, on_progress):
+    with pdfplumber.open(pdf_path) as pdf:
+        return run_preview_pipeline(app, pdf, on_progress=on_progress)
+
+def job_runner():
+    return get_job_runner(app._get_current_object(), run_preview_job)
+
+def submit_extract_job(request):
+    source, error = request_pdf_upload(request)
+    if error:
+        return error
+    if source is None:
+        return { "error": "No file part in request" }, 400
+
+    runner = job_runner()
+    if runner.pending >= app.config.get("JOB_QUEUE_LIMIT", 16):
+        return { "error": "Too many queued jobs, retry later" }, 429, { "Retry-After": str(app.config.get("EXTRACT_RETRY_AFTER", 5)) }
+
+    job_id = runner.store.create(source.path)
+    runner.submit(job_id)
+    runner.sweep()
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/extract-preview/jobs/{job_id}",
+        "result_url": f"/extract-preview/jobs/{job_id}/result"
+    }, 202
+
+def get_extract_job(job_id):
+    job = job_runner().store.get(job_id)
+    if job is None:
+        return { "error": "Job not found" }, 404
+    return job
+
+def get_extract_job_result(job_id):
+    store = job_runner().store
+    job = store.get(job_id)
+    if job is None:
+        return { "error": "Job not found" }, 404
+    if job["status"] == "failed":
+        return { "error": job.get("error") or "Extraction failed" }, 500
+    if job["status"] != "done":
+        return job, 202
+    return store.load_result(job_id)
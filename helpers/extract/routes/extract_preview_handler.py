@@ -3,54 +3,156 @@
 import os
 import time
 import uuid
-import io
 import pdfplumber
 from flask import current_app as app
 
 from extractor import PDFSelectiveNumericTableExtractor
-from helpers.extract.services.extract_from_pdf import extract_from_pdf
+from helpers.extract.services.extract_from_pdf import IncrementalRows, extract_from_pdf, prescan_indicators
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.core.diagnostics import diagnostics_requested
+from helpers.extract.core.memory_budget import MemoryBudgetExceeded, memory_budget
+from helpers.extract.core.page_ranges import format_pages, requested_pages
+from helpers.extract.services.page_result_cache import document_page_results
+from helpers.extract.services.result_cache import extraction_config_version, get_result_cache
+from helpers.extract.services.uploads import PdfSource, request_pdf_upload
 
-def run_extract_preview(request):
-    indicator_texts = [
-        "Šipke - specifikacija", "Šipke-specifikacija",
-        "šipke-Specifikacija", "šipke - Specifikacija",
-        "Šipke-Specifikacija", "Šipke - Specifikacija",
-        "Šipke specifikacija", "BINGO - GRAČANICA",
-        "BINGO-GRAČANICA",
-        "SPECIFIKACIJA - Armaturne šipke"
-    ]
-    field_mapping = { "ozn": 0, "diameter": 2, "lg": 3, "n": 4, "lgn": 5 }
-    columns_to_extract = [0, 2, 3, 4, 5]
-
-    pdf = None
-
-    if 'file' not in request.files or request.files['file'].filename == '':
-        default_path = "SPECIFIKACIJA ARMATURE ZIDOVA 2.SPRATA ISPRAVLJENO.pdf"
-        if not os.path.exists(default_path):
-            return { "error": "Default PDF not found" }, 500
-        try:
-            pdf = pdfplumber.open(default_path)
-        except Exception:
-            return { "error": "Could not open default PDF" }, 500
-    else:
-        uploaded = request.files['file']
-        if not ('.' in uploaded.filename and uploaded.filename.rsplit('.', 1)[1].lower() == "pdf"):
-            return { "error": "Invalid file type" }, 400
-        try:
-            pdf = pdfplumber.open(io.BytesIO(uploaded.read()))
-        except Exception:
-            return { "error": "Could not process uploaded file" }, 500
+INDICATOR_TEXTS = [
+    "Šipke - specifikacija", "Šipke-specifikacija",
+    "šipke-Specifikacija", "šipke - Specifikacija",
+    "Šipke-Specifikacija", "Šipke - Specifikacija",
+    "Šipke specifikacija", "BINGO - GRAČANICA",
+    "BINGO-GRAČANICA",
+    "SPECIFIKACIJA - Armaturne šipke"
+]
+FIELD_MAPPING = { "ozn": 0, "diameter": 2, "lg": 3, "n": 4, "lgn": 5 }
+COLUMNS_TO_EXTRACT = [0, 2, 3, 4, 5]
+DEFAULT_PDF_PATH = "SPECIFIKACIJA ARMATURE ZIDOVA 2.SPRATA ISPRAVLJENO.pdf"
 
-    if not pdf:
-        return { "error": "PDF object could not be initialized" }, 500
-
-    extractor = PDFSelectiveNumericTableExtractor(
+def create_preview_extractor(app, pdf, page_cache, cached_pages=None):
+    return PDFSelectiveNumericTableExtractor(
         pdf=pdf,
+        page_cache=page_cache,
         pdf_path="default.pdf",
-        columns_to_extract=columns_to_extract,
-        indicator_texts=indicator_texts,
-        field_mapping=field_mapping
+        columns_to_extract=COLUMNS_TO_EXTRACT,
+        indicator_texts=INDICATOR_TEXTS,
+        field_mapping=FIELD_MAPPING,
+        batch_cell_text=app.config.get("BATCH_CELL_TEXT", False),
+        cached_pages=cached_pages
     )
 
-    extracted_data = extractor.run()
-    return extract_from_pdf(app, pdf, extracted_data, indicator_texts)
+def preview_page_results(app, pdf, diagnostics=None):
+    # Cached pages carry no diagnostics records
+    if diagnostics or (diagnostics is None and app.config.get("EXTRACT_DIAGNOSTICS")):
+        return None
+    return document_page_results(app, pdf, extraction_config_version(app, INDICATOR_TEXTS, FIELD_MAPPING))
+
+def run_preview_pipeline(app, pdf, on_progress=None, diagnostics=None, pages=None):
+    page_cache = PageAnalysisCache(pdf, INDICATOR_TEXTS, pages)
+    cached_pages = preview_page_results(app, pdf, diagnostics)
+    extractor = create_preview_extractor(app, pdf, page_cache, cached_pages)
+
+    budget = memory_budget(app)
+
+    if app.config.get("BOUNDED_MEMORY"):
+        # One interleaved pass, so each page is released as soon as both stages are past it
+        rows = IncrementalRows(extractor.iter_page_rows())
+        return extract_from_pdf(
+            app, pdf, rows.rows, INDICATOR_TEXTS, page_cache=page_cache, on_progress=on_progress,
+            diagnostics=diagnostics, incremental_rows=rows, release_pages=True, budget=budget,
+            cached_pages=cached_pages
+        )
+
+    # Row parsing reads the indicator verdicts, so a page pool gets to them first
+    prescan_indicators(app, pdf, page_cache, cached_pages)
+    extracted_data = []
+    for page_num, rows in extractor.iter_page_rows():
+        extracted_data.extend(rows)
+        budget.check(page_num)
+    return extract_from_pdf(
+        app, pdf, extracted_data, INDICATOR_TEXTS, page_cache=page_cache, on_progress=on_progress,
+        diagnostics=diagnostics, budget=budget, cached_pages=cached_pages
+    )
+
+def read_request_pdf(request):
+    source, error = request_pdf_upload(request)
+    if error or source is not None:
+        return source, error
+
+    if not os.path.exists(DEFAULT_PDF_PATH):
+        return None, ({ "error": "Default PDF not found" }, 500)
+    return PdfSource(DEFAULT_PDF_PATH), None
+
+def open_pdf_source(source):
+    try:
+        pdf = pdfplumber.open(source.path)
+    except Exception:
+        if source.path != DEFAULT_PDF_PATH:
+            return None, ({ "error": "Could not process uploaded file" }, 500)
+        return None, ({ "error": "Could not open default PDF" }, 500)
+
+    if not pdf:
+        return None, ({ "error": "PDF object could not be initialized" }, 500)
+
+    return pdf, None
+
+def open_request_pdf(request):
+    source, error = read_request_pdf(request)
+    if error:
+        return None, error
+    return open_pdf_source(source)
+
+def open_request_pdf_pages(request):
+    """The request's PDF and its selected pages (None for all), or an error tuple."""
+    pdf, error = open_request_pdf(request)
+    if error:
+        return None, None, error
+    pages, error = requested_pages(request, len(pdf.pages))
+    if error:
+        pdf.close()
+        return None, None, error
+    return pdf, pages, None
+
+def run_extract_preview(request):
+    source, error = read_request_pdf(request)
+    if error:
+        return error
+    pages, error = requested_pages(request)
+    if error:
+        return error
+
+    # A cached payload would skip the run that writes the diagnostics bundle
+    diagnostics = diagnostics_requested(app, request)
+    cache = None if diagnostics else get_result_cache(app)
+    if cache is not None:
+        config_version = extraction_config_version(app, INDICATOR_TEXTS, FIELD_MAPPING)
+        if pages is not None:
+            config_version = f"{config_version}-pages-{format_pages(pages)}"
+        cache_key = cache.key_for(source.digest(), config_version)
+        cached_payload = cache.get(cache_key)
+        if cached_payload is not None:
+            return cached_payload
+
+    pdf, error = open_pdf_source(source)
+    if error:
+        return error
+    if pages is not None:
+        # Ranges are only checked against the page count once the document is open
+        pages, error = requested_pages(request, len(pdf.pages))
+        if error:
+            pdf.close()
+            return error
+
+    try:
+        with pdf:
+            payload = run_preview_pipeline(app, pdf, diagnostics=diagnostics, pages=pages)
+    except MemoryBudgetExceeded as e:
+        app.logger.warning(f"Extraction stopped: {e}")
+        return { "error": str(e) }, 413
+
+    if cache is not None:
+        try:
+            cache.put(cache_key, payload)
+        except OSError as e:
+            app.logger.warning(f"Could not store extraction result in cache: {e}")
+
+    return payload
@@ -0,0 +1,99 @@
+# helpers/routes/extract_stream_handler.py
+
+import json
+from flask import Response, current_app as app, stream_with_context
+
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.core.diagnostics import diagnostics_requested
+from helpers.extract.core.memory_budget import MemoryBudgetExceeded, memory_budget
+from helpers.extract.routes.extract_preview_handler import (
+    INDICATOR_TEXTS,
+    create_preview_extractor,
+    open_request_pdf_pages,
+    preview_page_results
+)
+from helpers.extract.services.extract_from_pdf import (
+    IncrementalRows,
+    iter_extraction,
+    new_extraction_state
+)
+
+def group_added_rows(added_rows):
+    groups = []
+    by_position = {}
+    for group, row in added_rows:
+        entry = by_position.get(group["position"])
+        if entry is None:
+            entry = { "position": group["position"], "order": group["order"], "rows": [] }
+            by_position[group["position"]] = entry
+            groups.append(entry)
+        entry["rows"].append(row)
+    return groups
+
+def iter_preview_records(app, pdf, diagnostics=None, pages=None):
+    try:
+        page_cache = PageAnalysisCache(pdf, INDICATOR_TEXTS, pages)
+        cached_pages = preview_page_results(app, pdf, diagnostics)
+        extractor = create_preview_extractor(app, pdf, page_cache, cached_pages)
+        # Numeric rows are parsed lazily so the first page can go out
+        # before the rest of the document has been read
+        rows = IncrementalRows(extractor.iter_page_rows())
+        state = new_extraction_state(app, rows.rows)
+
+        for pages_done, (page_num, pages_total, added_rows) in enumerate(iter_extraction(
+            app, pdf, state, INDICATOR_TEXTS, page_cache, incremental_rows=rows, diagnostics=diagnostics, flush_images=True,
+            release_pages=bool(app.config.get("BOUNDED_MEMORY")), budget=memory_budget(app), cached_pages=cached_pages
+        ), start=1):
+            if not added_rows:
+                continue
+            yield {
+                "type": "page",
+                "page": page_num,
+                "pages_done": pages_done,
+                "pages_total": pages_total,
+                "groups": group_added_rows(added_rows)
+            }
+
+        final_payload = state["final_payload"]
+        yield {
+            "type": "summary",
+            "pages_total": len(page_cache),
+            "groups": len(final_payload),
+            "rows": sum(len(group["rows"]) for group in final_payload),
+            "positions": [
+                { "position": group["position"], "order": group["order"] }
+                for group in final_payload
+            ]
+        }
+    except MemoryBudgetExceeded as e:
+        app.logger.warning(f"Streaming extraction stopped: {e}")
+        yield { "type": "error", "error": str(e) }
+    except Exception as e:
+        app.logger.error(f"Streaming extraction failed: {e}")
+        yield { "type": "error", "error": "Extraction failed" }
+    finally:
+        pdf.close()
+
+def format_ndjson(record):
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+def format_sse(record):
+    return f"event: {record['type']}\ndata: {json.dumps(record, ensure_ascii=False)}\n\n"
+
+def stream_extract_preview(request):
+    pdf, pages, error = open_request_pdf_pages(request)
+    if error:
+        return error
+
+    use_sse = (
+        request.args.get("format") == "sse"
+        or "text/event-stream" in request.headers.get("Accept", "")
+    )
+    formatter = format_sse if use_sse else format_ndjson
+    records = iter_preview_records(app._get_current_object(), pdf, diagnostics_requested(app, request), pages)
+
+    return Response(
+        stream_with_context(formatter(record) for record in records),
+        mimetype="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={ "Cache-Control": "no-cache", "X-Accel-Buffering": "no" }
+    )
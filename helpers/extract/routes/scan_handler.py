@@ -0,0 +1,42 @@
+# helpers/routes/scan_handler.py
+
+from flask import current_app as app
+
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.core.page_ranges import format_pages
+from helpers.extract.routes.extract_preview_handler import (
+    INDICATOR_TEXTS,
+    create_preview_extractor,
+    open_request_pdf_pages
+)
+
+def scan_pages(app, pdf, pages=None):
+    """Indicator, table count and numeric row count per page; nothing is rendered."""
+    page_cache = PageAnalysisCache(pdf, INDICATOR_TEXTS, pages)
+    extractor = create_preview_extractor(app, pdf, page_cache)
+
+    results = []
+    for page_num, analysis in page_cache:
+        found = analysis.contains_indicator
+        # Tables are only looked for where extraction would look for them
+        tables = analysis.tables if found else []
+        rows = extractor.extract_page_rows(analysis) if tables else []
+        results.append({ "page": page_num + 1, "indicator": found, "tables": len(tables), "rows": len(rows) })
+        page_cache.release(page_num)
+    return results
+
+def run_scan(request):
+    pdf, pages, error = open_request_pdf_pages(request)
+    if error:
+        return error
+
+    with pdf:
+        results = scan_pages(app, pdf, pages)
+        pages_total = len(pdf.pages)
+
+    return {
+        "pages_total": pages_total,
+        "pages": results,
+        # Ready to send back as the pages parameter of an extraction
+        "indicator_pages": format_pages(result["page"] - 1 for result in results if result["indicator"])
+    }
@@ -0,0 +1,64 @@
+# helpers/extract/services/admission.py
+
+import threading
+
+
+class AdmissionControl:
+    """Caps how many extraction requests a worker runs at once; the rest are turned away, not queued.
+
+    A request that cannot get a slot within wait_seconds should be answered
+    with 429 and Retry-After, so bursts are shed instead of piling up in memory.
+    """
+
+    def __init__(self, limit, wait_seconds=0, retry_after=5):
+        self.limit = limit
+        self.wait_seconds = wait_seconds
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def try_acquire(self):
+        if self._slots is not None:
+            if self.wait_seconds:
+                acquired = self._slots.acquire(timeout=self.wait_seconds)
+            else:
+                acquired = self._slots.acquire(blocking=False)
+            if not acquired:
+                with self._lock:
+                    self._rejected += 1
+                return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @property
+    def saturated(self):
+        return bool(self.limit) and self._in_flight >= self.limit
+
+    def status(self):
+        with self._lock:
+            return { "in_flight": self._in_flight, "limit": self.limit, "rejected": self._rejected }
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def get_admission(app):
+    global _admission
+    with _admission_lock:
+        if _admission is None:
+            _admission = AdmissionControl(
+                app.config.get("EXTRACT_CONCURRENCY", 0),
+                wait_seconds=app.config.get("EXTRACT_ADMISSION_WAIT", 0),
+                retry_after=app.config.get("EXTRACT_RETRY_AFTER", 5)
+            )
+        return _admission
@@ -0,0 +1,148 @@
+# helpers/extract/services/exports.py
+
+import csv
+import io
+import zipfile
+from xml.sax.saxutils import escape
+
+EXPORT_COLUMNS = ["position", "order", "page", "ozn", "diameter", "lg", "n", "lgn", "oblikIMere"]
+
+
+class ExportFailed(Exception):
+    pass
+
+
+def iter_export_pages(records):
+    """One list of export rows per extracted page, from iter_preview_records output."""
+    for record in records:
+        if record["type"] == "error":
+            # Headers are already sent: failing here truncates the transfer
+            raise ExportFailed(record["error"])
+        if record["type"] != "page":
+            continue
+        yield [
+            (group["position"], group["order"], record["page"] + 1)
+            + tuple(row.get(column) for column in EXPORT_COLUMNS[3:])
+            for group in record["groups"]
+            for row in group["rows"]
+        ]
+
+
+def iter_csv(pages):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in pages:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkBuffer:
+    """Write-only sink for zipfile; whatever has been compressed so far is drained per page."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Rows" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+}
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+COLUMN_LETTERS = [_column_letter(i) for i in range(len(EXPORT_COLUMNS))]
+
+
+def _row_xml(row_number, values):
+    cells = []
+    for letter, value in zip(COLUMN_LETTERS, values):
+        ref = f"{letter}{row_number}"
+        if value is None:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def iter_xlsx(pages):
+    """Single-sheet workbook with inline strings, so rows never have to be held for a shared string table."""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write((SHEET_HEAD + _row_xml(1, EXPORT_COLUMNS)).encode("utf-8"))
+            row_number = 1
+            for rows in pages:
+                for row in rows:
+                    row_number += 1
+                    sheet.write(_row_xml(row_number, row).encode("utf-8"))
+                chunk = buffer.drain()
+                if chunk:
+                    yield chunk
+            sheet.write(SHEET_TAIL.encode("utf-8"))
+    yield buffer.drain()
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "xlsx": (iter_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+}
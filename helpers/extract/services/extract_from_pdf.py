@@ -4,81 +4,300 @@ import os
 import time
 import uuid
 from PIL import ImageDraw
-from helpers.extract.core.page_extraction import run_page_extraction
+from helpers.extract.core.page_extraction import collect_page_images, merge_page_result
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.core.shape_store import get_shape_store
+from helpers.extract.core.diagnostics import DiagnosticsBundle
+from helpers.extract.core.image_writer import image_extension, new_image_batch
+from helpers.extract.core.metrics import stage
+from helpers.extract.core.page_render import (
+    ScaledDraw,
+    full_page_size,
+    render_page,
+    render_region,
+    shape_column_bbox
+)
+from helpers.extract.services.parallel_pages import process_pages_in_parallel, scan_pages_in_parallel
 
-def extract_from_pdf(app, pdf, extracted_data, indicator_texts):
-    timestamp = "test_timestamp" if app.config.get("TESTING") else str(time.time()) + str(uuid.uuid4())
+def page_context(app, analysis, page_num, table, image, origin, draw, image_size, folder, timestamp, diagnostics=False, image_writer=None):
+    all_cells = [cell for row in table.rows for cell in row.cells if cell]
+    return {
+        "page_num": page_num,
+        "page_obj": analysis.page,
+        "page_analysis": analysis,
+        "page_width_pdf": analysis.page.width,
+        "page_height_pdf": analysis.page.height,
+        "pil_image_obj": image,
+        "image_origin": origin,
+        "image_draw_context": draw,
+        "img_width_pixels": image_size[0],
+        "img_height_pixels": image_size[1],
+        "table": table,
+        "table_x_min_pdf": min(cell[0] for cell in all_cells),
+        "table_x_max_pdf": max(cell[2] for cell in all_cells),
+        "row_first_cell_heights": [
+            (r.cells[0][1], r.cells[0][3]) if len(r.cells) > 0 and r.cells[0] else None
+            for r in table.rows
+        ],
+        "page_folder": folder,
+        "timestamp": timestamp,
+        "images_collected_for_page": [],
+        "shape_store": get_shape_store(app),
+        "diagnostics": [] if diagnostics else None,
+        "image_writer": image_writer,
+        "app": app
+    }
 
-    final_payload = []
-    position_group_map = {}
-    global_data_index = 0
-    current_position = "Pozicija_1"
-    current_order = -1
+def process_page(app, analysis, page_num, timestamp, diagnostics=False, image_writer=None):
+    page_obj = analysis.page
+    tables = analysis.tables
 
-    for page_num, page_obj in enumerate(pdf.pages):
-        text = page_obj.extract_text() or ""
-        if not any(ind.lower() in text.lower() for ind in indicator_texts):
-            continue
+    if not tables:
+        return None
 
-        tables = page_obj.find_tables({
-            "vertical_strategy": "lines",
-            "horizontal_strategy": "lines"
-        })
+    table = tables[0]
+    all_cells = [cell for row in table.rows for cell in row.cells if cell]
+    if not all_cells:
+        return None
 
-        if not tables:
-            continue
+    resolution = app.config.get("SHAPE_RENDER_DPI", 300)
+    render_mode = app.config.get("SHAPE_RENDER_MODE", "page")
+    preview_mode = app.config.get("PREVIEW_MODE", "shape")
 
-        table = tables[0]
-        all_cells = [cell for row in table.rows for cell in row.cells if cell]
-        if not all_cells:
-            continue
+    try:
+        region = shape_column_bbox(table) if render_mode == "column" and not page_obj.rotation else None
+        with stage("render"):
+            if region is not None:
+                image, origin = render_region(page_obj, region, resolution)
+                img_width, img_height = full_page_size(page_obj, resolution)
+            else:
+                image, origin = render_page(page_obj, resolution), (0, 0)
+                img_width, img_height = image.size
+    except Exception as e:
+        app.logger.error(f"Page {page_num} render failed: {e}")
+        return None
 
+    if preview_mode == "off":
+        preview, draw = None, None
+    elif preview_mode == "low":
+        preview_resolution = app.config.get("PREVIEW_DPI", 72)
         try:
-            image = page_obj.to_image(resolution=300).original
+            with stage("render"):
+                preview = render_page(page_obj, preview_resolution)
+            draw = ScaledDraw(preview, preview.width / img_width)
         except Exception as e:
-            app.logger.error(f"Page {page_num} render failed: {e}")
-            continue
-
-        folder = os.path.join(app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes"), str(timestamp))
-        os.makedirs(folder, exist_ok=True)
-
-        ctx = {
-            "page_num": page_num,
-            "page_obj": page_obj,
-            "page_width_pdf": page_obj.width,
-            "page_height_pdf": page_obj.height,
-            "pil_image_obj": image,
-            "image_draw_context": ImageDraw.Draw(image),
-            "img_width_pixels": image.width,
-            "img_height_pixels": image.height,
-            "table": table,
-            "table_x_min_pdf": min(cell[0] for cell in all_cells),
-            "table_x_max_pdf": max(cell[2] for cell in all_cells),
-            "row_first_cell_heights": [
-                (r.cells[0][1], r.cells[0][3]) if len(r.cells) > 0 and r.cells[0] else None
-                for r in table.rows
-            ],
-            "page_folder": folder,
-            "timestamp": timestamp,
-            "current_page_position_text": current_position,
-            "current_page_position_order": current_order,
-            "global_data_index": global_data_index,
-            "images_collected_for_page": [],
-            "extracted_data": extracted_data,
-            "position_group_map": position_group_map,
-            "final_payload": final_payload,
-            "app": app
-        }
-
-        run_page_extraction(ctx)
-
-        current_position = ctx["current_page_position_text"]
-        current_order = ctx["current_page_position_order"]
-        global_data_index = ctx["global_data_index"]
+            app.logger.error(f"Page {page_num} preview render failed: {e}")
+            preview, draw = None, None
+    else:
+        preview = image
+        draw = ImageDraw.Draw(image) if origin == (0, 0) else ScaledDraw(image, 1, origin)
+
+    folder = os.path.join(app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes"), str(timestamp))
+    os.makedirs(folder, exist_ok=True)
+
+    # Without a document-wide writer (pool workers), the page's own images
+    # must be on disk before its result is handed back
+    owns_writer = image_writer is None
+    if owns_writer:
+        image_writer = new_image_batch(app)
+
+    ctx = page_context(
+        app, analysis, page_num, table, image, origin, draw, (img_width, img_height),
+        folder, timestamp, diagnostics, image_writer
+    )
 
+    with stage("crop"):
+        page_result = collect_page_images(ctx)
+
+    if preview is not None:
         try:
-            image.save(os.path.join(folder, f"preview_{page_num}.png"))
+            image_writer.write(preview, os.path.join(folder, f"preview_{page_num}.{image_extension(image_writer.settings)}"))
         except Exception as e:
             app.logger.error(f"Preview image save failed: {e}")
 
-    return final_payload
+    if owns_writer:
+        image_writer.wait()
+        page_result["unwritten"] = sorted(unwritten_images(app, image_writer))
+
+    return page_result
+
+def unwritten_images(app, image_writer):
+    """oblikIMere URLs of the shapes whose write-behind write failed and that are not on disk."""
+    shapes_root = app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes")
+    failed, image_writer.failed_paths = image_writer.failed_paths, []
+    return {
+        "extracted_shapes/" + os.path.relpath(path, shapes_root).replace("\\", "/")
+        for path in failed if not os.path.exists(path)
+    }
+
+def discard_unwritten_rows(app, state, unwritten, added_rows=()):
+    # The numeric row was consumed in order, so dropping it keeps the rows after it aligned
+    if not unwritten:
+        return added_rows
+    for group in state["final_payload"]:
+        kept = [row for row in group["rows"] if row["oblikIMere"] not in unwritten]
+        if len(kept) < len(group["rows"]):
+            app.logger.error(f"Skipped {len(group['rows']) - len(kept)} rows of {group['position']}: shape image could not be written")
+            group["rows"][:] = kept
+    return [(group, row) for group, row in added_rows if row["oblikIMere"] not in unwritten]
+
+def new_extraction_state(app, extracted_data):
+    return {
+        "current_page_position_text": "Pozicija_1",
+        "current_page_position_order": -1,
+        "global_data_index": 0,
+        "extracted_data": extracted_data,
+        "position_group_map": {},
+        "final_payload": [],
+        "app": app
+    }
+
+def parallel_workers(app, release_pages=False):
+    # Pool workers each hold their own copy of the document, so bounded mode stays serial
+    return 0 if release_pages else int(app.config.get("PARALLEL_PAGE_WORKERS") or 0)
+
+def prescan_indicators(app, pdf, page_cache, cached_pages=None, release_pages=False):
+    """With a page pool, scans the pages not yet judged for indicators there instead of here."""
+    workers = parallel_workers(app, release_pages)
+    page_nums = [
+        page_num for page_num in page_cache.page_nums
+        if not page_cache.has_indicator_verdict(page_num)
+        and (cached_pages is None or cached_pages.lookup(page_num) is None)
+    ]
+    if workers > 1 and len(page_nums) > 1:
+        scan_pages_in_parallel(app, pdf, page_cache, page_nums, workers)
+
+class IncrementalRows:
+    """Pulls numeric rows page by page, only as far as the shape pages have consumed them."""
+
+    def __init__(self, page_rows):
+        self.rows = []
+        self.page_num = -1
+        self._page_rows = iter(page_rows)
+
+    def fill(self, count):
+        while len(self.rows) < count:
+            try:
+                page_num, rows = next(self._page_rows)
+            except StopIteration:
+                break
+            self.page_num = page_num
+            self.rows.extend(rows)
+
+def iter_extraction(app, pdf, state, indicator_texts, page_cache=None, incremental_rows=None, diagnostics=None, flush_images=False, release_pages=False, budget=None, cached_pages=None):
+    timestamp = "test_timestamp" if app.config.get("TESTING") else str(time.time()) + str(uuid.uuid4())
+    if diagnostics is None:
+        diagnostics = bool(app.config.get("EXTRACT_DIAGNOSTICS"))
+
+    if page_cache is None:
+        page_cache = PageAnalysisCache(pdf, indicator_texts)
+
+    # Only the pages the request selected count towards progress
+    pages_total = len(page_cache)
+    workers = parallel_workers(app, release_pages)
+
+    def is_cached(page_num):
+        return cached_pages is not None and cached_pages.lookup(page_num) is not None
+
+    prescan_indicators(app, pdf, page_cache, cached_pages, release_pages)
+    indicator_pages = [
+        page_num for page_num, analysis in page_cache
+        if not is_cached(page_num) and analysis.contains_indicator
+    ] if workers > 1 else []
+
+    image_writer = None
+    results = None
+    if len(indicator_pages) > 1:
+        results = dict(zip(
+            indicator_pages,
+            process_pages_in_parallel(app, pdf, indicator_pages, indicator_texts, timestamp, workers, diagnostics)
+        ))
+    else:
+        image_writer = new_image_batch(app)
+
+    def run_page(page_num):
+        # Unchanged pages come from the page cache without being parsed at all
+        if is_cached(page_num):
+            return cached_pages.page_result(page_num)
+        if results is not None:
+            page_result = results.get(page_num)
+        else:
+            analysis = page_cache.get(page_num)
+            page_result = process_page(app, analysis, page_num, timestamp, diagnostics, image_writer) if analysis.contains_indicator else None
+        if cached_pages is not None:
+            cached_pages.record_page_result(page_num, page_result)
+        return page_result
+
+    page_results = ((page_num, run_page(page_num)) for page_num in page_cache.page_nums)
+
+    bundle = None
+    if diagnostics:
+        bundle = DiagnosticsBundle(os.path.join(app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes"), str(timestamp)))
+
+    # Pages still needed by the lazily parsed numeric rows are released later
+    unreleased = []
+
+    # Pages are merged strictly in page order so positions and row
+    # assignment come out the same however the pages were processed
+    try:
+        for page_num, page_result in page_results:
+            added_rows = []
+            if page_result is not None:
+                if incremental_rows is not None:
+                    incremental_rows.fill(state["global_data_index"] + len(page_result["images"]))
+                added_rows = merge_page_result(state, page_result)
+                # Pool pages report their own failed writes
+                added_rows = discard_unwritten_rows(app, state, set(page_result.get("unwritten") or ()), added_rows)
+                if bundle is not None:
+                    bundle.write(page_result["diagnostics"])
+            if release_pages:
+                unreleased.append(page_num)
+                rows_page_num = incremental_rows.page_num if incremental_rows is not None else len(pdf.pages)
+                for done_page_num in list(unreleased):
+                    if (
+                        done_page_num <= rows_page_num
+                        or is_cached(done_page_num)
+                        or not page_cache.get(done_page_num).contains_indicator
+                    ):
+                        page_cache.release(done_page_num)
+                        unreleased.remove(done_page_num)
+            if budget is not None:
+                budget.check(page_num)
+            # Streamed rows point at their images, so those must exist first
+            if flush_images and added_rows and image_writer is not None:
+                image_writer.wait()
+                added_rows = discard_unwritten_rows(app, state, unwritten_images(app, image_writer), added_rows)
+            yield page_num, pages_total, added_rows
+
+        if image_writer is not None:
+            image_writer.wait()
+            discard_unwritten_rows(app, state, unwritten_images(app, image_writer))
+        # A group whose every row was skipped has nothing left to show
+        state["final_payload"][:] = [group for group in state["final_payload"] if group["rows"]]
+    finally:
+        for done_page_num in unreleased:
+            page_cache.release(done_page_num)
+        if image_writer is not None:
+            image_writer.wait()
+        if cached_pages is not None:
+            # Only now are the new pages' images all on disk
+            try:
+                cached_pages.flush()
+            except OSError as e:
+                app.logger.warning(f"Could not store page results in cache: {e}")
+        if bundle is not None:
+            bundle.close()
+            app.logger.info(f"Diagnostics bundle written to {bundle.path}")
+
+def extract_from_pdf(app, pdf, extracted_data, indicator_texts, page_cache=None, on_progress=None, diagnostics=None,
+                     incremental_rows=None, release_pages=False, budget=None, cached_pages=None):
+    state = new_extraction_state(app, extracted_data)
+
+    for pages_done, (_, pages_total, _) in enumerate(iter_extraction(
+        app, pdf, state, indicator_texts, page_cache, incremental_rows=incremental_rows,
+        diagnostics=diagnostics, release_pages=release_pages, budget=budget, cached_pages=cached_pages
+    ), start=1):
+        if on_progress is not None:
+            on_progress(pages_done, pages_total)
+
+    return state["final_payload"]
@@ -0,0 +1,230 @@
+# helpers/extract/services/job_queue.py
+
+import json
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.extract.services.uploads import link_or_copy
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+UNFINISHED_STATUSES = ("queued", "running")
+ORPHANED_ERROR = "The server process running this job stopped before it finished; submit the PDF again"
+
+
+def new_owner():
+    """Identifies one job runner: host, process and a token that differs per runner."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+
+def owner_alive(owner):
+    try:
+        host, pid, _ = owner.split(":")
+        pid = int(pid)
+    except (AttributeError, ValueError):
+        return False
+    if host != socket.gethostname() or os.name == "nt":
+        # Another machine's processes can't be checked, and os.kill would end a Windows one
+        return True
+    if pid == os.getpid():
+        # A runner of this very process is alive only if it is the current one
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """On-disk job records, one folder per job, readable from every server process.
+
+    Jobs run in the thread pool of the process that accepted them. When that
+    process is gone (recycled or crashed), its unfinished jobs are marked failed
+    the next time anyone reads them.
+    """
+
+    def __init__(self, root, owner=None):
+        self.root = root
+        self.owner = owner
+
+    def job_folder(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id or ""):
+            return None
+        return os.path.join(self.root, job_id)
+
+    def input_path(self, job_id):
+        return os.path.join(self.job_folder(job_id), "input.pdf")
+
+    def create(self, pdf_path):
+        job_id = uuid.uuid4().hex
+        folder = self.job_folder(job_id)
+        os.makedirs(folder, exist_ok=True)
+        # The spooled upload is removed when the request ends; a hard link keeps the bytes without a copy
+        link_or_copy(pdf_path, self.input_path(job_id))
+        self._write_json(job_id, "job.json", {
+            "job_id": job_id,
+            "status": "queued",
+            "owner": self.owner,
+            "pages_done": 0,
+            "pages_total": None,
+            "error": None,
+            "created_at": time.time(),
+            "updated_at": time.time()
+        })
+        return job_id
+
+    def get(self, job_id):
+        folder = self.job_folder(job_id)
+        if folder is None:
+            return None
+        job = self._read_json(job_id, "job.json")
+        if job is not None and self.is_orphaned(job):
+            job = self.update(job_id, status="failed", error=ORPHANED_ERROR)
+        return job
+
+    def is_orphaned(self, job):
+        if job.get("status") not in UNFINISHED_STATUSES:
+            return False
+        owner = job.get("owner")
+        return owner != self.owner and not owner_alive(owner)
+
+    def update(self, job_id, **fields):
+        job = self._read_json(job_id, "job.json") or {}
+        job.update(fields)
+        job["updated_at"] = time.time()
+        self._write_json(job_id, "job.json", job)
+        return job
+
+    def save_result(self, job_id, payload):
+        self._write_json(job_id, "result.json", payload)
+
+    def load_result(self, job_id):
+        if self.job_folder(job_id) is None:
+            return None
+        return self._read_json(job_id, "result.json")
+
+    def sweep(self, ttl_seconds):
+        """Fails orphaned jobs and removes finished ones not updated for ttl_seconds."""
+        if not os.path.isdir(self.root):
+            return 0
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False) or self.job_folder(entry.name) is None:
+                continue
+            job = self.get(entry.name)
+            if job is None:
+                # Half-created folder; judge it by its age alone
+                expired = now - entry.stat().st_mtime > ttl_seconds
+            else:
+                expired = job["status"] not in UNFINISHED_STATUSES and now - job["updated_at"] > ttl_seconds
+            if ttl_seconds and expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _read_json(self, job_id, name):
+        path = os.path.join(self.job_folder(job_id), name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_json(self, job_id, name, data):
+        # Write-then-rename so readers in other workers never see a partial file
+        folder = self.job_folder(job_id)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(folder, name))
+
+
+class JobRunner:
+    def __init__(self, app, store, run_job, workers=2, ttl_seconds=0, sweep_interval=300):
+        self.app = app
+        self.store = store
+        self.run_job = run_job
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract-job")
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, job_id):
+        with self._lock:
+            self._pending += 1
+        self.executor.submit(self._run, job_id)
+
+    def sweep(self, force=False):
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        try:
+            removed = self.store.sweep(self.ttl_seconds)
+        except OSError as e:
+            self.app.logger.warning(f"Extraction job sweep failed: {e}")
+            return
+        if removed:
+            self.app.logger.info(f"Removed {removed} expired extraction jobs")
+
+    def _run(self, job_id):
+        def on_progress(pages_done, pages_total):
+            self.store.update(job_id, pages_done=pages_done, pages_total=pages_total)
+
+        try:
+            self.store.update(job_id, status="running")
+            with self.app.app_context():
+                payload = self.run_job(self.app, self.store.input_path(job_id), on_progress)
+            self.store.save_result(job_id, payload)
+            self.store.update(job_id, status="done")
+        except Exception as e:
+            self.app.logger.error(f"Extraction job {job_id} failed: {e}")
+            self.store.update(job_id, status="failed", error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+            try:
+                os.remove(self.store.input_path(job_id))
+            except OSError:
+                pass
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner(app, run_job):
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            store = JobStore(app.config.get("JOBS_FOLDER", "extract_jobs"), owner=new_owner())
+            _runner = JobRunner(
+                app, store, run_job,
+                workers=app.config.get("JOB_WORKERS", 2),
+                ttl_seconds=app.config.get("JOBS_TTL_SECONDS", 24 * 3600),
+                sweep_interval=app.config.get("SHAPES_SWEEP_INTERVAL", 300)
+            )
+            # Jobs left behind by a previous process are failed as the runner starts
+            _runner.sweep(force=True)
+        return _runner
+
+
+def job_queue_depth():
+    return _runner.pending if _runner is not None else 0
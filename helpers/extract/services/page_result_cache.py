@@ -0,0 +1,163 @@
+# helpers/extract/services/page_result_cache.py
+
+import hashlib
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral
+
+from helpers.extract.services.result_cache import ResultCache
+from helpers.extract.services.shape_storage import touch_shapes
+
+
+class PageContentHasher:
+    """Hashes what a page draws: its content streams, the resources they use and its geometry.
+
+    Streams are hashed by their decoded bytes and memoised by object id, so
+    fonts and images shared across pages are read once per document.
+    Object numbers never enter the hash, so an unchanged page of a re-saved
+    revision hashes the same even when its objects were renumbered.
+    """
+
+    def __init__(self):
+        self._objects = {}
+
+    def page_hash(self, page):
+        digest = hashlib.sha256()
+        digest.update(repr((page.bbox, page.mediabox, page.rotation)).encode("utf-8"))
+        page_obj = page.page_obj
+        for stream in page_obj.contents or []:
+            digest.update(self._object_digest(stream, set()))
+        digest.update(self._object_digest(page_obj.resources, set()))
+        return digest.hexdigest()
+
+    def _object_digest(self, obj, visiting):
+        if isinstance(obj, PDFObjRef):
+            objid = obj.objid
+            cached = self._objects.get(objid)
+            if cached is not None:
+                return cached
+            if objid in visiting:
+                return b"cycle"
+            visiting.add(objid)
+            try:
+                value = self._object_digest(obj.resolve(), visiting)
+            finally:
+                visiting.discard(objid)
+            self._objects[objid] = value
+            return value
+
+        digest = hashlib.sha256()
+        if isinstance(obj, PDFStream):
+            digest.update(b"stream")
+            digest.update(self._object_digest(obj.attrs, visiting))
+            digest.update(obj.get_data() or b"")
+        elif isinstance(obj, dict):
+            digest.update(b"dict")
+            for key in sorted(obj, key=str):
+                # /Parent and /P point back up the page tree
+                if key in ("Parent", "P"):
+                    continue
+                digest.update(str(key).encode("utf-8"))
+                digest.update(self._object_digest(obj[key], visiting))
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b"list")
+            for item in obj:
+                digest.update(self._object_digest(item, visiting))
+        elif isinstance(obj, PSLiteral):
+            digest.update(b"/" + str(obj.name).encode("utf-8"))
+        elif isinstance(obj, bytes):
+            digest.update(b"bytes" + obj)
+        else:
+            digest.update(repr(obj).encode("utf-8"))
+        return digest.digest()
+
+
+class PageResultCache(ResultCache):
+    """Disk-backed cache of one page's numeric rows and collected shape images.
+
+    Keyed by page content hash and extraction config. Like the document
+    cache it stores image paths, not images: an entry whose shapes have been
+    swept is dropped on lookup, and a hit touches the shapes it reuses.
+    """
+
+    def key_for(self, page_hash, config_version):
+        return f"{page_hash}-{config_version}"
+
+    def _touch_images(self, entry):
+        page_result = entry.get("page_result") or {}
+        return touch_shapes(self.shapes_root, [image["img_path_segment"] for image in page_result.get("images", [])])
+
+
+class DocumentPageResults:
+    """One document's view of the page cache while it is being extracted.
+
+    The numeric rows (from the extractor) and the page result (from the shape
+    pipeline) of a page arrive separately; flush() stores the pages for which
+    both are known once their images are on disk.
+    """
+
+    def __init__(self, cache, pdf, config_version):
+        self.cache = cache
+        self.pdf = pdf
+        self.config_version = config_version
+        self.hasher = PageContentHasher()
+        self._keys = {}
+        self._hits = {}
+        self._rows = {}
+        self._page_results = {}
+
+    def _key(self, page_num):
+        key = self._keys.get(page_num)
+        if key is None:
+            key = self.cache.key_for(self.hasher.page_hash(self.pdf.pages[page_num]), self.config_version)
+            self._keys[page_num] = key
+        return key
+
+    def lookup(self, page_num):
+        if page_num not in self._hits:
+            self._hits[page_num] = self.cache.get(self._key(page_num))
+        return self._hits[page_num]
+
+    def rows(self, page_num):
+        entry = self.lookup(page_num)
+        return entry["rows"] if entry is not None else None
+
+    def page_result(self, page_num):
+        page_result = self.lookup(page_num)["page_result"]
+        if page_result is None:
+            return None
+        return { **page_result, "page_num": page_num, "diagnostics": None }
+
+    def record_rows(self, page_num, rows):
+        self._rows[page_num] = rows
+
+    def record_page_result(self, page_num, page_result):
+        self._page_results[page_num] = page_result
+
+    def flush(self):
+        written = False
+        for page_num, page_result in self._page_results.items():
+            rows = self._rows.get(page_num)
+            # A page with rows but no result failed to render; don't remember that
+            if rows is None or (page_result is None and rows):
+                continue
+            stored = None
+            if page_result is not None:
+                stored = { key: page_result[key] for key in ("images", "position_text", "position_increments") }
+            self.cache.write(self._key(page_num), { "rows": rows, "page_result": stored })
+            written = True
+        self._rows.clear()
+        self._page_results.clear()
+        if written:
+            self.cache.evict()
+
+
+def document_page_results(app, pdf, config_version):
+    if not app.config.get("PAGE_CACHE_ENABLED"):
+        return None
+    cache = PageResultCache(
+        app.config.get("PAGE_CACHE_FOLDER", "page_cache"),
+        app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes"),
+        app.config.get("PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    )
+    return DocumentPageResults(cache, pdf, config_version)
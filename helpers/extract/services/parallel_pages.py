@@ -0,0 +1,150 @@
+# helpers/extract/services/parallel_pages.py
+
+import atexit
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfplumber
+
+from helpers.extract.core.page_analysis import PageAnalysisCache
+
+# Documents a pool process keeps open; requests interleave, so more than one
+WORKER_DOCUMENTS = 2
+
+_worker = { "documents": OrderedDict() }
+
+
+class WorkerApp:
+    """Stands in for the Flask app inside pool processes: plain config and a logger."""
+
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger("extract.worker")
+
+
+def worker_config(app):
+    return {
+        key: value for key, value in app.config.items()
+        if isinstance(value, (str, int, float, bool, type(None)))
+    }
+
+
+def document_source(pdf):
+    """What a pool process needs to open the document, and a key to keep it open under."""
+    if pdf.path:
+        path = str(pdf.path)
+        stat = os.stat(path)
+        return { "key": (path, stat.st_size, stat.st_mtime_ns), "source": path }
+    pdf.stream.seek(0)
+    data = pdf.stream.read()
+    return { "key": hashlib.sha256(data).hexdigest(), "source": data }
+
+
+def _init_worker():
+    # Pay for the pipeline imports once per process, not on its first page
+    import helpers.extract.services.extract_from_pdf  # noqa: F401
+
+
+def _worker_page_cache(document, indicator_texts):
+    documents = _worker["documents"]
+    key = (document["key"], tuple(indicator_texts))
+    page_cache = documents.get(key)
+    if page_cache is None:
+        source = document["source"]
+        pdf = pdfplumber.open(source if isinstance(source, str) else io.BytesIO(source))
+        page_cache = documents[key] = PageAnalysisCache(pdf, indicator_texts)
+        while len(documents) > WORKER_DOCUMENTS:
+            _, evicted = documents.popitem(last=False)
+            evicted.pdf.close()
+    documents.move_to_end(key)
+    return page_cache
+
+
+def _scan_page(document, indicator_texts, page_num):
+    page_cache = _worker_page_cache(document, indicator_texts)
+    found = page_cache.get(page_num).contains_indicator
+    if not found:
+        page_cache.release(page_num)
+    return found
+
+
+def _process_page(document, indicator_texts, config, page_num, timestamp, diagnostics):
+    from helpers.extract.services.extract_from_pdf import process_page
+
+    page_cache = _worker_page_cache(document, indicator_texts)
+    try:
+        return process_page(WorkerApp(config), page_cache.get(page_num), page_num, timestamp, diagnostics)
+    finally:
+        page_cache.release(page_num)
+
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def get_page_pool(app, workers):
+    """The process's page pool, started on first use and kept for later requests."""
+    global _pool, _pool_key
+    start_method = app.config.get("PARALLEL_START_METHOD", "spawn")
+    with _pool_lock:
+        if _pool is not None and _pool_key != (workers, start_method):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=_init_worker
+            )
+            _pool_key = (workers, start_method)
+        return _pool
+
+
+def shutdown_page_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_page_pool)
+
+
+def _map_on_pool(app, workers, fn, *iterables):
+    try:
+        # map() yields in submission order, which keeps the merge deterministic
+        return list(get_page_pool(app, workers).map(fn, *iterables))
+    except BrokenProcessPool:
+        # A pool process died; start a fresh pool on the next request
+        shutdown_page_pool()
+        raise
+
+
+def scan_pages_in_parallel(app, pdf, page_cache, page_nums, workers):
+    """Runs the indicator scan of page_nums on the pool and records the verdicts in page_cache."""
+    document = document_source(pdf)
+    count = len(page_nums)
+    found = _map_on_pool(
+        app, workers, _scan_page, [document] * count, [page_cache.indicator_texts] * count, page_nums
+    )
+    for page_num, contains_indicator in zip(page_nums, found):
+        page_cache.record_indicator(page_num, contains_indicator)
+
+
+def process_pages_in_parallel(app, pdf, page_nums, indicator_texts, timestamp, workers, diagnostics=False):
+    document = document_source(pdf)
+    config = worker_config(app)
+    count = len(page_nums)
+    return _map_on_pool(
+        app, workers, _process_page, [document] * count, [indicator_texts] * count, [config] * count,
+        page_nums, [timestamp] * count, [diagnostics] * count
+    )
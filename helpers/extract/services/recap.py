@@ -0,0 +1,101 @@
+# helpers/extract/services/recap.py
+
+import pandas as pd
+
+# Nominal mass of reinforcing bars, kg per metre, by diameter in mm
+KG_PER_METER = {
+    6: 0.222, 8: 0.395, 10: 0.617, 12: 0.888, 14: 1.21, 16: 1.58, 18: 2.00,
+    20: 2.47, 22: 2.98, 25: 3.85, 28: 4.83, 32: 6.31, 36: 7.99, 40: 9.87
+}
+# Steel at 7850 kg/m3: pi / 4 * d^2 * 7850 / 1e6, for diameters missing above
+KG_PER_METER_PER_MM2 = 0.00616538
+
+ROW_COLUMNS = ["ozn", "diameter", "lg", "n", "lgn"]
+
+
+def rows_frame(rows):
+    return pd.DataFrame.from_records(rows, columns=ROW_COLUMNS)
+
+
+def payload_frame(final_payload):
+    rows = [row for group in final_payload for row in group["rows"]]
+    frame = pd.DataFrame.from_records(rows, columns=ROW_COLUMNS)
+    frame["position"] = [group["position"] for group in final_payload for _ in group["rows"]]
+    return frame
+
+
+def _weighted(frame):
+    frame = frame.copy()
+    for column in ("diameter", "n", "lgn"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    kg_per_meter = frame["diameter"].map(KG_PER_METER)
+    frame["kg_per_m"] = kg_per_meter.fillna(KG_PER_METER_PER_MM2 * frame["diameter"] ** 2)
+    frame["weight"] = frame["lgn"] * frame["kg_per_m"]
+    return frame.dropna(subset=["diameter"])
+
+
+def _number(value):
+    # Whole numbers print as 16, not 16.0; fractional ones are kept as they are
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def _numbers(series):
+    return pd.Series([_number(value) for value in series], index=series.index, dtype=object)
+
+
+def _totals(grouped, **extra):
+    totals = grouped.agg(
+        **extra,
+        bars=("n", "size"),
+        n=("n", "sum"),
+        lgn=("lgn", "sum"),
+        weight=("weight", "sum")
+    )
+    totals["n"] = _numbers(totals["n"])
+    totals["lgn"] = totals["lgn"].round(2)
+    totals["weight"] = totals["weight"].round(2)
+    return totals.reset_index()
+
+
+def recapitulate(frame):
+    """Totals of count, length (lgn, m) and weight (kg) per diameter and, when known, per position."""
+    weighted = _weighted(frame)
+
+    # kg_per_m comes from the rows so it is the rate the weight was computed with
+    by_diameter = _totals(weighted.groupby("diameter"), kg_per_m=("kg_per_m", "first"))
+    by_diameter["diameter"] = _numbers(by_diameter["diameter"])
+    by_diameter["kg_per_m"] = by_diameter["kg_per_m"].round(3)
+
+    recap = {
+        "by_diameter": by_diameter.to_dict("records"),
+        "total": {
+            "bars": int(len(weighted)),
+            "n": _number(weighted["n"].sum()),
+            "lgn": round(float(weighted["lgn"].sum()), 2),
+            "weight": round(float(weighted["weight"].sum()), 2)
+        }
+    }
+
+    if "position" in weighted:
+        by_position = _totals(weighted.groupby(["position", "diameter"], sort=False, dropna=False))
+        by_position["diameter"] = _numbers(by_position["diameter"])
+        position_totals = _totals(weighted.groupby("position", sort=False, dropna=False))
+        recap["by_position"] = [
+            {
+                **totals,
+                "diameters": by_position[by_position["position"] == totals["position"]]
+                    .drop(columns="position")
+                    .to_dict("records")
+            }
+            for totals in position_totals.to_dict("records")
+        ]
+
+    return recap
+
+
+def recap_rows(rows):
+    return recapitulate(rows_frame(rows))
+
+
+def recap_payload(final_payload):
+    return recapitulate(payload_frame(final_payload))
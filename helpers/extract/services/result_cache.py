@@ -0,0 +1,148 @@
+# helpers/extract/services/result_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+
+from helpers.extract.services.shape_storage import touch_shapes
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: eviction runs unlocked
+    fcntl = None
+
+# Bump when a change to the pipeline alters the payload or the shape images
+EXTRACTION_VERSION = 1
+
+CONFIG_KEYS = (
+    "SHAPE_RENDER_MODE",
+    "SHAPE_RENDER_DPI",
+    "BATCH_CELL_TEXT",
+    "SHAPE_STORE",
+    "SHAPE_IMAGE_FORMAT",
+    "SHAPE_IMAGE_MODE",
+    "SHAPE_PNG_COMPRESS_LEVEL",
+    "SHAPE_WEBP_QUALITY",
+    "SHAPE_WEBP_LOSSLESS"
+)
+
+
+def sha256_of_source(source):
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extraction_config_version(app, indicator_texts, field_mapping):
+    config = {
+        "version": EXTRACTION_VERSION,
+        "indicator_texts": list(indicator_texts),
+        "field_mapping": field_mapping,
+        "settings": { key: app.config.get(key) for key in CONFIG_KEYS }
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class ResultCache:
+    """Disk-backed final_payload cache keyed by PDF hash and extraction config.
+
+    Entries are written with an atomic rename, so gunicorn workers can share
+    the folder. A hit refreshes the entry's mtime; eviction drops the least
+    recently used entries once the folder grows past max_bytes.
+    """
+
+    def __init__(self, root, shapes_root, max_bytes):
+        self.root = root
+        self.shapes_root = shapes_root
+        self.max_bytes = max_bytes
+
+    def key_for(self, pdf_sha256, config_version):
+        return f"{pdf_sha256}-{config_version}"
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # The shape images can be swept independently of the cache entry; the
+        # ones handed out again are touched so the sweeper keeps them
+        if not self._touch_images(payload):
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def put(self, key, payload):
+        self.write(key, payload)
+        self.evict()
+
+    def write(self, key, payload):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._path(key))
+
+    def evict(self):
+        lock_file = open(os.path.join(self.root, ".lock"), "w")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return  # another worker is already evicting
+
+            entries = []
+            total = 0
+            for entry in os.scandir(self.root):
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+        finally:
+            lock_file.close()
+
+    def _touch_images(self, payload):
+        return touch_shapes(self.shapes_root, [
+            row.get("oblikIMere", "").split("/", 1)[-1]
+            for group in payload
+            for row in group.get("rows", [])
+        ])
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_result_cache(app):
+    if not app.config.get("RESULT_CACHE_ENABLED"):
+        return None
+    return ResultCache(
+        app.config.get("RESULT_CACHE_FOLDER", "result_cache"),
+        app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes"),
+        app.config.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    )
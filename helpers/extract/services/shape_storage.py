@@ -0,0 +1,181 @@
+# helpers/extract/services/shape_storage.py
+
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: sweeps run unlocked
+    fcntl = None
+
+from helpers.extract.core.shape_store import SHAPES_SUBFOLDER
+
+
+def touch_shapes(root, segments):
+    """Marks the eviction units of shapes (paths under root) as just used; False if one is gone."""
+    units = set()
+    for segment in segments:
+        try:
+            os.utime(os.path.join(root, segment))
+        except OSError:
+            return False
+        unit = segment.split("/", 1)[0]
+        if unit != SHAPES_SUBFOLDER:
+            units.add(unit)
+    for unit in units:
+        try:
+            os.utime(os.path.join(root, unit))
+        except OSError:
+            return False
+    return True
+
+
+class ShapeStorageManager:
+    """TTL and size-capped LRU lifecycle for the extracted_shapes folder.
+
+    Each per-request folder is one eviction unit; files in the shared
+    content-addressed shapes folder are units of their own. Serving a file,
+    or handing out a cached payload or stored shape that points at it, touches
+    its unit, so mtime doubles as the last-access time.
+    """
+
+    def __init__(self, root, ttl_seconds, max_bytes, sweep_interval, logger=None):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.logger = logger
+        self._usage = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def touch(self, timestamp, filename):
+        touch_shapes(self.root, [f"{timestamp}/{filename}"])
+
+    def _units(self):
+        units = []
+        if not os.path.isdir(self.root):
+            return units
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name == SHAPES_SUBFOLDER:
+                for shape in os.scandir(entry.path):
+                    if shape.is_file(follow_symlinks=False):
+                        stat = shape.stat()
+                        units.append((stat.st_mtime, stat.st_size, 1, shape.path))
+                continue
+            size = 0
+            files = 0
+            for dirpath, _, filenames in os.walk(entry.path):
+                for name in filenames:
+                    try:
+                        size += os.path.getsize(os.path.join(dirpath, name))
+                        files += 1
+                    except OSError:
+                        pass
+            units.append((entry.stat().st_mtime, size, files, entry.path))
+        return units
+
+    def _remove(self, path):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def sweep(self):
+        os.makedirs(self.root, exist_ok=True)
+        lock_file = open(os.path.join(self.root, ".sweep.lock"), "w")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return self.usage()  # another worker is sweeping
+
+            now = time.time()
+            evicted = 0
+            kept = []
+            for unit in sorted(self._units()):
+                if self.ttl_seconds and now - unit[0] > self.ttl_seconds:
+                    self._remove(unit[3])
+                    evicted += 1
+                else:
+                    kept.append(unit)
+
+            total = sum(unit[1] for unit in kept)
+            while kept and self.max_bytes and total > self.max_bytes:
+                unit = kept.pop(0)
+                self._remove(unit[3])
+                total -= unit[1]
+                evicted += 1
+
+            self._usage = {
+                "bytes": total,
+                "files": sum(unit[2] for unit in kept),
+                "units": len(kept),
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted_last_sweep": evicted,
+                "last_sweep_at": now
+            }
+            return self._usage
+        finally:
+            lock_file.close()
+
+    def usage(self):
+        if self._usage is None:
+            units = self._units()
+            return {
+                "bytes": sum(unit[1] for unit in units),
+                "files": sum(unit[2] for unit in units),
+                "units": len(units),
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted_last_sweep": None,
+                "last_sweep_at": None
+            }
+        return self._usage
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="shape-storage-sweeper", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.warning(f"Shape storage sweep failed: {e}")
+            time.sleep(self.sweep_interval)
+
+
+_managers = {}
+_manager_lock = threading.Lock()
+
+
+def get_shape_storage(app):
+    """The manager of the app's shapes folder, one per folder, following the app's current limits."""
+    root = app.config.get("EXTRACTED_SHAPES_FOLDER", "extracted_shapes")
+    with _manager_lock:
+        limits = {
+            "ttl_seconds": app.config.get("SHAPES_TTL_SECONDS", 24 * 3600),
+            "max_bytes": app.config.get("SHAPES_MAX_BYTES", 2 * 1024 ** 3),
+            "sweep_interval": app.config.get("SHAPES_SWEEP_INTERVAL", 300)
+        }
+        manager = _managers.get(root)
+        if manager is None:
+            manager = _managers[root] = ShapeStorageManager(root, logger=app.logger, **limits)
+        else:
+            for name, value in limits.items():
+                setattr(manager, name, value)
+        return manager
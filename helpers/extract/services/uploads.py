@@ -0,0 +1,90 @@
+# helpers/extract/services/uploads.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import NamedTuple, Optional
+
+from flask import Request, current_app
+
+from helpers.extract.services.result_cache import sha256_of_source
+
+
+class SpooledUploadFile:
+    """Multipart file part streamed straight to a uniquely named file, hashed as it arrives.
+
+    close() removes the file; Flask closes every uploaded file when the
+    request context ends, so uploads never outlive their request.
+    """
+
+    def __init__(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(dir=folder, prefix="upload-", suffix=".pdf")
+        self._file = os.fdopen(fd, "w+b")
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.name)
+        except OSError:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledUploadFile(current_app.config.get("UPLOAD_FOLDER") or tempfile.gettempdir())
+
+
+class PdfSource(NamedTuple):
+    path: str
+    sha256: Optional[str] = None
+
+    def digest(self):
+        return self.sha256 or sha256_of_source(self.path)
+
+
+def allowed_pdf(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() == "pdf"
+
+
+def request_pdf_upload(request):
+    """The uploaded PDF as a PdfSource, (None, None) when there is none, or an error tuple."""
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return None, None
+
+    uploaded = request.files['file']
+    if not allowed_pdf(uploaded.filename):
+        return None, ({ "error": "Invalid file type" }, 400)
+
+    stream = uploaded.stream
+    if not isinstance(stream, SpooledUploadFile):
+        # Requests built without UploadRequest: spool once, closed with the request
+        stream = SpooledUploadFile(current_app.config.get("UPLOAD_FOLDER") or tempfile.gettempdir())
+        shutil.copyfileobj(uploaded.stream, stream, 1024 * 1024)
+        uploaded.stream = stream
+
+    stream.flush()
+    return PdfSource(stream.name, stream.sha256), None
+
+
+def link_or_copy(source_path, target_path):
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copyfile(source_path, target_path)
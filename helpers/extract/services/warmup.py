@@ -0,0 +1,63 @@
+# helpers/extract/services/warmup.py
+
+import importlib
+
+from helpers.extract.core.metrics import reset_metrics
+
+# app.py imports these on first use; a preforking server loads them once up front
+HANDLER_MODULES = (
+    "helpers.extract.routes.extract_preview_handler",
+    "helpers.extract.routes.extract_stream_handler",
+    "helpers.extract.routes.extract_export_handler",
+    "helpers.extract.routes.extract_jobs_handler",
+    "helpers.extract.routes.scan_handler",
+    "helpers.extract.services.recap"
+)
+
+_state = { "warmed_up": False }
+
+
+def warmed_up():
+    return _state["warmed_up"]
+
+
+def warm_up(app, pdf_path=None, pages=1):
+    """Parse, match, detect tables and render the first pages of a bundled PDF.
+
+    Run in the gunicorn master before forking, so workers inherit loaded
+    pdfminer/PIL/pypdfium2 code and warm caches. It starts no threads: a
+    thread pool created before fork would be dead in every worker.
+    """
+    for name in HANDLER_MODULES:
+        importlib.import_module(name)
+
+    import pdfplumber
+
+    from helpers.extract.core.page_analysis import PageAnalysisCache
+    from helpers.extract.core.page_render import render_page
+    from helpers.extract.routes.extract_preview_handler import (
+        DEFAULT_PDF_PATH,
+        INDICATOR_TEXTS,
+        create_preview_extractor
+    )
+
+    pdf_path = pdf_path or DEFAULT_PDF_PATH
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            page_cache = PageAnalysisCache(pdf, INDICATOR_TEXTS)
+            extractor = create_preview_extractor(app, pdf, page_cache)
+            for page_num in range(min(pages, len(pdf.pages))):
+                analysis = page_cache.get(page_num)
+                analysis.contains_indicator
+                analysis.tables
+                extractor.extract_page_rows(analysis)
+                render_page(analysis.page, app.config.get("PREVIEW_DPI", 72))
+    except Exception as e:
+        app.logger.warning(f"Warm-up on {pdf_path} failed: {e}")
+        return False
+    finally:
+        # Warm-up work is not traffic
+        reset_metrics()
+
+    _state["warmed_up"] = True
+    return True
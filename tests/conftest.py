@@ -7,6 +7,20 @@ from app import app as flask_app
 import pytest
 import pathlib
 
+@pytest.fixture(autouse=True)
+def isolated_app_folders(tmp_path):
+    # Caches, uploads and jobs must never land in the repo or carry over between tests
+    folders = {
+        "RESULT_CACHE_FOLDER": str(tmp_path / "result_cache"),
+        "PAGE_CACHE_FOLDER": str(tmp_path / "page_cache"),
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+        "JOBS_FOLDER": str(tmp_path / "extract_jobs")
+    }
+    saved = { key: flask_app.config.get(key) for key in folders }
+    flask_app.config.update(folders)
+    yield
+    flask_app.config.update(saved)
+
 @pytest.fixture(params=["test_1", "test_2", "test_3", "test_4", "test_5"])  # Add more as needed
 def test_env(request, tmp_path):
     fixture_name = request.param
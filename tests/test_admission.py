@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from app import app as flask_app
+from helpers.extract.routes.extract_preview_handler import DEFAULT_PDF_PATH
+from helpers.extract.services import admission as admission_module
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_PDF = os.path.join(BASE_DIR, DEFAULT_PDF_PATH)
+
+@pytest.fixture
+def admission(tmp_path, monkeypatch):
+    config = { "TESTING": True, "EXTRACTED_SHAPES_FOLDER": str(tmp_path / "shapes"), "RESULT_CACHE_ENABLED": False }
+    saved = { key: flask_app.config.get(key) for key in config }
+    flask_app.config.update(config)
+    control = admission_module.AdmissionControl(1, retry_after=7)
+    monkeypatch.setattr(admission_module, "_admission", control)
+    yield control
+    flask_app.config.update(saved)
+
+def post_sample(client, url):
+    with open(SAMPLE_PDF, "rb") as f:
+        return client.post(url, data={ "file": (f, "sample.pdf") })
+
+def test_saturated_worker_answers_429_but_not_to_preflight(admission):
+    client = flask_app.test_client()
+    assert admission.try_acquire()
+    try:
+        response = post_sample(client, "/extract-preview")
+        preflight = client.options("/extract-preview/stream", headers={ "Origin": "http://example.com", "Access-Control-Request-Method": "POST" })
+    finally:
+        admission.release()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert response.get_json() == { "error": "Server busy, retry later" }
+    assert preflight.status_code == 200
+    assert admission.status() == { "in_flight": 0, "limit": 1, "rejected": 1 }
+
+def test_streamed_response_holds_its_slot_until_finished(admission):
+    response = post_sample(flask_app.test_client(), "/extract-preview/stream")
+    chunks = iter(response.response)
+    next(chunks)
+    assert admission.status()["in_flight"] == 1
+
+    for _ in chunks:
+        pass
+    response.close()
+    assert admission.status()["in_flight"] == 0
@@ -0,0 +1,15 @@
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def test_importing_app_does_not_load_the_pdf_stack():
+    # conftest has already imported app here, so check in a fresh interpreter
+    code = (
+        "import json, sys, app; "
+        "print(json.dumps([m for m in ('pdfplumber', 'PIL', 'pandas', 'extractor') if m in sys.modules]))"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
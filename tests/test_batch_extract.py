@@ -0,0 +1,29 @@
+import json
+import os
+
+from batch_extract import find_pdfs, is_up_to_date, output_paths
+
+def test_outputs_mirror_input_folders(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "spec.pdf").write_bytes(b"%PDF")
+    (tmp_path / "a" / "notes.txt").write_text("x")
+
+    pdfs = find_pdfs([str(tmp_path)])
+    outputs = output_paths(pdfs, "out")
+
+    assert [os.path.relpath(p, tmp_path) for p in pdfs] == [os.path.join("a", "spec.pdf"), os.path.join("b", "spec.pdf")]
+    assert sorted(outputs.values()) == [os.path.join("out", "a", "spec.json"), os.path.join("out", "b", "spec.json")]
+
+def test_result_is_stale_when_pdf_is_newer_or_config_changed(tmp_path):
+    pdf = tmp_path / "spec.pdf"
+    result = tmp_path / "spec.json"
+    pdf.write_bytes(b"%PDF")
+    result.write_text(json.dumps({ "config_version": "v1" }))
+    os.utime(pdf, (1000, 1000))
+    os.utime(result, (2000, 2000))
+
+    assert is_up_to_date(str(pdf), str(result), "v1")
+    assert not is_up_to_date(str(pdf), str(result), "v2")
+    os.utime(pdf, (3000, 3000))
+    assert not is_up_to_date(str(pdf), str(result), "v1")
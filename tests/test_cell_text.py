@@ -0,0 +1,45 @@
+import os
+
+import pdfplumber
+
+from extractor import PDFSelectiveNumericTableExtractor
+from helpers.extract.core.cell_text import CellTextIndex
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.routes.extract_preview_handler import COLUMNS_TO_EXTRACT, FIELD_MAPPING, INDICATOR_TEXTS
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_PDFS = [os.path.join(BASE_DIR, "SPECIFIKACIJA ARMATURE ZIDOVA 2.SPRATA ISPRAVLJENO.pdf")]
+
+def extract_rows(pdf_path, batch_cell_text):
+    return PDFSelectiveNumericTableExtractor(
+        pdf_path=pdf_path,
+        columns_to_extract=COLUMNS_TO_EXTRACT,
+        indicator_texts=INDICATOR_TEXTS,
+        field_mapping=FIELD_MAPPING,
+        batch_cell_text=batch_cell_text
+    ).run()
+
+def test_batched_cell_text_returns_the_same_rows():
+    for pdf_path in SAMPLE_PDFS:
+        rows = extract_rows(pdf_path, batch_cell_text=True)
+
+        assert rows
+        assert rows == extract_rows(pdf_path, batch_cell_text=False)
+
+def test_batched_cell_text_matches_page_crop_cell_by_cell():
+    for pdf_path in SAMPLE_PDFS:
+        with pdfplumber.open(pdf_path) as pdf:
+            extractor = PDFSelectiveNumericTableExtractor(pdf_path, COLUMNS_TO_EXTRACT, INDICATOR_TEXTS, FIELD_MAPPING, pdf=pdf)
+            for _, analysis in PageAnalysisCache(pdf, INDICATOR_TEXTS):
+                if not analysis.contains_indicator:
+                    continue
+                page = analysis.page
+                index = CellTextIndex(page, analysis.chars)
+                for table in analysis.tables:
+                    for row in table.rows:
+                        bboxes = [extractor.clamp_bbox(cell, page) for cell in row.cells if cell]
+                        batched = [index.text(bbox) for bbox in bboxes]
+                        cropped = [page.crop(bbox).extract_text() for bbox in bboxes]
+                        # Row text decides where parsing stops, so it must match too
+                        assert batched == cropped
+                        assert " ".join(filter(None, batched)).lower() == " ".join(filter(None, cropped)).lower()
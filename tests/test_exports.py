@@ -0,0 +1,35 @@
+import io
+import zipfile
+
+import pytest
+
+from helpers.extract.services.exports import ExportFailed, iter_csv, iter_export_pages, iter_xlsx
+
+RECORDS = [
+    { "type": "page", "page": 0, "groups": [
+        { "position": "Zid & stub", "order": 0, "rows": [{ "ozn": 1, "diameter": 12, "lg": 1.5, "n": 2, "lgn": 3.0, "oblikIMere": "extracted_shapes/a.png" }] }
+    ] },
+    { "type": "page", "page": 2, "groups": [
+        { "position": "Ploča", "order": 1, "rows": [{ "ozn": 1, "diameter": 8, "lg": None, "n": 4, "lgn": 2.0 }] }
+    ] },
+    { "type": "summary" }
+]
+
+def test_csv_is_written_one_chunk_per_page():
+    chunks = list(iter_csv(iter_export_pages(RECORDS)))
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert lines[0].startswith("position,order,page")
+    assert lines[1] == "Zid & stub,0,1,1,12,1.5,2,3.0,extracted_shapes/a.png"
+    assert lines[2] == "Ploča,1,3,1,8,,4,2.0,"
+
+def test_xlsx_is_a_valid_archive_with_escaped_inline_strings():
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_xlsx(iter_export_pages(RECORDS)))))
+    assert archive.testzip() is None
+    sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    assert "<t>Zid &amp; stub</t>" in sheet
+    assert '<row r="3">' in sheet
+
+def test_error_record_stops_the_export():
+    with pytest.raises(ExportFailed):
+        list(iter_csv(iter_export_pages([{ "type": "error", "error": "Extraction failed" }])))
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pdfplumber
+import pytest
+
+from app import app as flask_app
+from helpers.extract.core.indicator_matcher import get_indicator_matcher
+from helpers.extract.routes.extract_preview_handler import DEFAULT_PDF_PATH, INDICATOR_TEXTS
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_PDF = os.path.join(BASE_DIR, DEFAULT_PDF_PATH)
+
+@pytest.fixture
+def client(tmp_path):
+    config = { "TESTING": True, "EXTRACTED_SHAPES_FOLDER": str(tmp_path / "shapes"), "RESULT_CACHE_ENABLED": False }
+    saved = { key: flask_app.config.get(key) for key in config }
+    flask_app.config.update(config)
+    yield flask_app.test_client()
+    flask_app.config.update(saved)
+
+def post_sample(client, url):
+    with open(SAMPLE_PDF, "rb") as f:
+        return client.post(url, data={ "file": (f, "sample.pdf") })
+
+def test_char_prefilter_keeps_every_indicator_page():
+    matcher = get_indicator_matcher(tuple(INDICATOR_TEXTS))
+    with pdfplumber.open(SAMPLE_PDF) as pdf:
+        indicator_pages = [page for page in pdf.pages if matcher.matches(page.extract_text())]
+        assert indicator_pages
+        assert all(matcher.could_match_chars(page.chars) for page in indicator_pages)
+
+def test_stream_sends_the_preview_rows_page_by_page(client):
+    response = post_sample(client, "/extract-preview/stream")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    page_records = [record for record in records if record["type"] == "page"]
+
+    assert response.status_code == 200 and response.mimetype == "application/x-ndjson"
+    assert page_records and records[-1]["type"] == "summary"
+    assert [record["page"] for record in page_records] == sorted(record["page"] for record in page_records)
+
+    payload = post_sample(client, "/extract-preview").get_json()
+    streamed = [row for record in page_records for group in record["groups"] for row in group["rows"]]
+    assert streamed == [row for group in payload for row in group["rows"]]
+    assert records[-1]["rows"] == len(streamed)
+    assert [p["position"] for p in records[-1]["positions"]] == [group["position"] for group in payload]
@@ -0,0 +1,40 @@
+import logging
+import os
+
+import pdfplumber
+
+from app import app as flask_app
+from helpers.extract.core import image_writer
+from helpers.extract.routes.extract_preview_handler import DEFAULT_PDF_PATH, run_preview_pipeline
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FAILING_SHAPE = "page_0_row_4_cell_1.png"
+
+def preview_rows(shapes_folder):
+    config = { "TESTING": True, "EXTRACTED_SHAPES_FOLDER": str(shapes_folder), "PAGE_CACHE_ENABLED": False, "IMAGE_WRITER_WORKERS": 2 }
+    saved = { key: flask_app.config.get(key) for key in config }
+    flask_app.config.update(config)
+    try:
+        with flask_app.app_context(), pdfplumber.open(os.path.join(BASE_DIR, DEFAULT_PDF_PATH)) as pdf:
+            payload = run_preview_pipeline(flask_app, pdf)
+    finally:
+        flask_app.config.update(saved)
+    return [row for group in payload for row in group["rows"]]
+
+def test_failed_write_behind_write_skips_its_row(tmp_path, monkeypatch, caplog):
+    expected = preview_rows(tmp_path / "ok")
+    write_image = image_writer.write_image
+
+    def failing_write_image(image, path, *args, **kwargs):
+        if path.endswith(FAILING_SHAPE):
+            raise OSError("disk full")
+        return write_image(image, path, *args, **kwargs)
+
+    monkeypatch.setattr(image_writer, "write_image", failing_write_image)
+    with caplog.at_level(logging.ERROR):
+        rows = preview_rows(tmp_path / "failing")
+
+    assert [row for row in expected if not row["oblikIMere"].endswith(FAILING_SHAPE)] == rows
+    assert len(rows) == len(expected) - 1
+    assert all(os.path.isfile(tmp_path / "failing" / row["oblikIMere"].split("/", 1)[1]) for row in rows)
+    assert "could not be written" in caplog.text
@@ -0,0 +1,26 @@
+from helpers.extract.core.indicator_matcher import IndicatorMatcher, normalize_text
+
+INDICATORS = [
+    "Šipke - specifikacija", "Šipke-specifikacija",
+    "šipke-Specifikacija", "BINGO - GRAČANICA"
+]
+
+def test_variants_collapse_to_one_needle():
+    matcher = IndicatorMatcher(INDICATORS)
+    assert matcher.needles == ["sipkespecifikacija", "bingogracanica"]
+
+def test_matches_ignoring_case_diacritics_and_separators():
+    matcher = IndicatorMatcher(INDICATORS)
+    assert matcher.matches("POZ 1\nSIPKE  –  Specifikacija\n")
+    assert matcher.matches("Bingo-Gračanica")
+    assert not matcher.matches("Osnova temelja")
+    assert not matcher.matches("")
+
+def test_char_prefilter_never_rejects_a_matching_page():
+    matcher = IndicatorMatcher(INDICATORS)
+    chars = [{"text": ch} for ch in "specifikacija - šipke"]
+    assert matcher.could_match_chars(chars)
+    assert not matcher.could_match_chars([{"text": ch} for ch in "tlocrt"])
+
+def test_normalize_text():
+    assert normalize_text("Šipke - Specifikacija") == "sipkespecifikacija"
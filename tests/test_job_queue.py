@@ -0,0 +1,33 @@
+import os
+import time
+
+from helpers.extract.services.job_queue import JobStore, new_owner
+
+def make_job(store, tmp_path):
+    pdf_path = tmp_path / "input.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    return store.create(str(pdf_path))
+
+def test_jobs_of_a_stopped_process_are_failed(tmp_path):
+    root = str(tmp_path / "jobs")
+    job_id = make_job(JobStore(root, owner=new_owner()), tmp_path)
+
+    assert JobStore(root, owner=new_owner()).get(job_id)["status"] == "failed"
+
+def test_own_unfinished_jobs_are_left_alone(tmp_path):
+    store = JobStore(str(tmp_path / "jobs"), owner=new_owner())
+    job_id = make_job(store, tmp_path)
+    store.update(job_id, status="running")
+
+    assert store.get(job_id)["status"] == "running"
+
+def test_sweep_removes_expired_finished_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs"), owner=new_owner())
+    old_id = make_job(store, tmp_path)
+    new_id = make_job(store, tmp_path)
+    store.update(old_id, status="done")
+    store._write_json(old_id, "job.json", { **store.get(old_id), "updated_at": time.time() - 7200 })
+
+    assert store.sweep(3600) == 1
+    assert not os.path.exists(store.job_folder(old_id))
+    assert store.get(new_id)["status"] == "queued"
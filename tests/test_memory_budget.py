@@ -0,0 +1,57 @@
+import itertools
+import json
+import os
+
+import pdfplumber
+import pytest
+
+from app import app as flask_app
+from helpers.extract.core import memory_budget
+from helpers.extract.routes.extract_preview_handler import DEFAULT_PDF_PATH
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+@pytest.fixture
+def over_budget(tmp_path, monkeypatch):
+    # Every RSS reading is 8 MB above the last, so a 1 MB budget is blown on the first page checked
+    readings = itertools.count(0, 8 * 1024 * 1024)
+    monkeypatch.setattr(memory_budget, "current_rss_bytes", lambda: next(readings))
+
+    closed = []
+    close = pdfplumber.PDF.close
+    def spy_close(pdf):
+        closed.append(pdf)
+        return close(pdf)
+    monkeypatch.setattr(pdfplumber.PDF, "close", spy_close)
+
+    config = {
+        "TESTING": True,
+        "EXTRACTED_SHAPES_FOLDER": str(tmp_path / "shapes"),
+        "RESULT_CACHE_ENABLED": False,
+        "PAGE_CACHE_ENABLED": False,
+        "BOUNDED_MEMORY": True,
+        "MEMORY_BUDGET_MB": 1
+    }
+    saved = { key: flask_app.config.get(key) for key in config }
+    flask_app.config.update(config)
+    yield closed
+    flask_app.config.update(saved)
+
+def post_sample(url):
+    with open(os.path.join(BASE_DIR, DEFAULT_PDF_PATH), "rb") as f:
+        return flask_app.test_client().post(url, data={ "file": (f, "sample.pdf") })
+
+def test_preview_over_budget_answers_413_and_closes_the_pdf(over_budget):
+    response = post_sample("/extract-preview")
+
+    assert response.status_code == 413
+    assert "over the 1 MB budget" in response.get_json()["error"]
+    assert len(over_budget) == 1
+
+def test_stream_over_budget_ends_with_an_error_record_and_closes_the_pdf(over_budget):
+    response = post_sample("/extract-preview/stream")
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert records[-1]["type"] == "error" and "budget" in records[-1]["error"]
+    assert not any(record["type"] == "summary" for record in records)
+    assert len(over_budget) == 1
@@ -0,0 +1,30 @@
+import contextvars
+import re
+import threading
+import time
+
+from helpers.extract.core import metrics
+
+def durations(header):
+    return { name: float(value) for name, value in re.findall(r"([\w-]+);dur=([\d.]+)", header) }
+
+def test_overlapping_stages_report_wall_time():
+    metrics.start_request_timings()
+    barrier = threading.Barrier(4)
+
+    def encode():
+        barrier.wait()
+        with metrics.stage("encode"):
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(encode,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    header = metrics.server_timing_header()
+    timings = durations(header)
+    assert timings["encode"] <= timings["total"]
+    assert timings["encode-cpu"] > timings["encode"]
+    assert 'desc="encode summed across threads"' in header
@@ -0,0 +1,48 @@
+import gzip
+import json
+import os
+
+from app import app as flask_app
+from helpers.extract.core.diagnostics import DiagnosticsBundle
+from helpers.extract.core.page_extraction import merge_page_result
+from helpers.extract.services.extract_from_pdf import new_extraction_state
+
+def numeric_row(ozn):
+    return { "ozn": ozn, "diameter": 12, "lg": 1.0, "n": 2, "lgn": 2.0 }
+
+def image(name, position=None, order_offset=0):
+    return { "position": position, "img_path_segment": f"ts/{name}.png", "order_offset": order_offset }
+
+def test_position_continues_across_a_page_boundary():
+    state = new_extraction_state(flask_app, [numeric_row(ozn) for ozn in range(1, 5)])
+
+    merge_page_result(state, {
+        "images": [image("a", "Zid (1 kom)", 1), image("b", "Zid (1 kom)", 1)],
+        "position_text": "Zid (1 kom)",
+        "position_increments": 1
+    })
+    # The next page opens without a position header: its rows still belong to Zid
+    added = merge_page_result(state, {
+        "images": [image("c"), image("d", "Ploča (2 kom)", 1)],
+        "position_text": "Ploča (2 kom)",
+        "position_increments": 1
+    })
+
+    groups = state["final_payload"]
+    assert [(group["position"], group["order"]) for group in groups] == [("Zid (1 kom)", 0), ("Ploča (2 kom)", 1)]
+    assert [row["ozn"] for row in groups[0]["rows"]] == [1, 2, 3]
+    assert groups[0]["rows"][2]["oblikIMere"] == "extracted_shapes/ts/c.png"
+    assert [group["position"] for group, _ in added] == ["Zid (1 kom)", "Ploča (2 kom)"]
+    assert state["current_page_position_text"] == "Ploča (2 kom)"
+
+def test_diagnostics_bundle_is_one_file_and_only_when_written(tmp_path):
+    with DiagnosticsBundle(str(tmp_path / "empty")) as bundle:
+        bundle.write([])
+    assert not os.path.exists(tmp_path / "empty")
+
+    with DiagnosticsBundle(str(tmp_path / "doc")) as bundle:
+        bundle.write([{ "page": 0, "row_index": 2 }])
+        bundle.write([{ "page": 1, "row_index": 3 }])
+    assert os.listdir(tmp_path / "doc") == ["diagnostics.ndjson.gz"]
+    with gzip.open(bundle.path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["page"] for line in f] == [0, 1]
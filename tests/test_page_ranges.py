@@ -0,0 +1,18 @@
+import pytest
+
+from helpers.extract.core.page_ranges import PageRangeError, format_pages, parse_pages
+
+def test_ranges_are_one_based_sorted_and_deduplicated():
+    assert parse_pages("5, 1-3,2") == [0, 1, 2, 4]
+    assert format_pages([4, 0, 1, 2]) == "1-3,5"
+    assert parse_pages(format_pages([0, 3, 4, 5, 9])) == [0, 3, 4, 5, 9]
+
+@pytest.mark.parametrize("value", ["", "0", "3-1", "a", "1-", "1-20000"])
+def test_invalid_ranges_are_rejected(value):
+    with pytest.raises(PageRangeError):
+        parse_pages(value)
+
+def test_pages_past_the_end_are_rejected():
+    assert parse_pages("1-4", page_count=4) == [0, 1, 2, 3]
+    with pytest.raises(PageRangeError, match="Page 5"):
+        parse_pages("2,5", page_count=4)
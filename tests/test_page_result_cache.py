@@ -0,0 +1,94 @@
+import os
+
+import pdfplumber
+
+from helpers.extract.services.page_result_cache import DocumentPageResults, PageContentHasher, PageResultCache
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_PDF = os.path.join(BASE_DIR, "SPECIFIKACIJA ARMATURE ZIDOVA 2.SPRATA ISPRAVLJENO.pdf")
+
+def test_page_hash_is_stable_across_opens_and_differs_between_pages():
+    with pdfplumber.open(SAMPLE_PDF) as first, pdfplumber.open(SAMPLE_PDF) as second:
+        first_hashes = [PageContentHasher().page_hash(page) for page in first.pages[:3]]
+        hasher = PageContentHasher()
+        second_hashes = [hasher.page_hash(page) for page in second.pages[:3]]
+
+    assert first_hashes == second_hashes
+    assert len(set(first_hashes)) == 3
+
+def test_only_complete_pages_are_stored(tmp_path):
+    cache = PageResultCache(str(tmp_path / "pages"), str(tmp_path / "shapes"), 1024 * 1024)
+    with pdfplumber.open(SAMPLE_PDF) as pdf:
+        pages = DocumentPageResults(cache, pdf, "v1")
+        page_result = { "images": [], "position_text": "Zid", "position_increments": 1 }
+        pages.record_rows(0, [{ "ozn": 1 }])
+        pages.record_page_result(0, page_result)
+        pages.record_rows(1, [{ "ozn": 2 }])
+        pages.record_page_result(1, None)  # rows but no result: the render failed
+        pages.record_page_result(2, page_result)  # rows never parsed
+        pages.flush()
+
+        reopened = DocumentPageResults(cache, pdf, "v1")
+        assert reopened.rows(0) == [{ "ozn": 1 }]
+        assert reopened.page_result(0)["position_text"] == "Zid"
+        assert reopened.lookup(1) is None
+        assert reopened.lookup(2) is None
+        assert DocumentPageResults(cache, pdf, "v2").lookup(0) is None
+
+def revise_page(source_path, revised_path, page_num):
+    # Re-save the document with one extra, invisible path object on one page
+    import pypdfium2
+
+    source = pypdfium2.PdfDocument(source_path)
+    revised = pypdfium2.PdfDocument.new()
+    revised.import_pages(source, list(range(len(source))))
+    page = revised[page_num]
+    rect = pypdfium2.raw.FPDFPageObj_CreateNewRect(5, 5, 3, 3)
+    pypdfium2.raw.FPDFPath_SetDrawMode(rect, 0, 0)
+    pypdfium2.raw.FPDFPage_InsertObject(page, rect)
+    pypdfium2.raw.FPDFPage_GenerateContent(page)
+    revised.save(revised_path)
+    revised.close()
+    source.close()
+
+def test_revised_pdf_reextracts_only_the_changed_page(tmp_path, monkeypatch):
+    from app import app as flask_app
+    from extractor import PDFSelectiveNumericTableExtractor
+    from helpers.extract.routes.extract_preview_handler import run_preview_pipeline
+    from helpers.extract.services import extract_from_pdf
+
+    rendered, parsed = [], []
+    process_page = extract_from_pdf.process_page
+    extract_page_rows = PDFSelectiveNumericTableExtractor.extract_page_rows
+
+    def spy_process_page(app, analysis, page_num, *args):
+        rendered.append(page_num)
+        return process_page(app, analysis, page_num, *args)
+
+    def spy_extract_page_rows(self, analysis):
+        parsed.append(analysis.page.page_number - 1)
+        return extract_page_rows(self, analysis)
+
+    monkeypatch.setattr(extract_from_pdf, "process_page", spy_process_page)
+    monkeypatch.setattr(PDFSelectiveNumericTableExtractor, "extract_page_rows", spy_extract_page_rows)
+
+    def preview(pdf_path, **config):
+        rendered.clear()
+        parsed.clear()
+        config = { "TESTING": True, "EXTRACTED_SHAPES_FOLDER": str(tmp_path / "shapes"), "PAGE_CACHE_ENABLED": True, **config }
+        saved = { key: flask_app.config.get(key) for key in config }
+        flask_app.config.update(config)
+        try:
+            with flask_app.app_context(), pdfplumber.open(pdf_path) as pdf:
+                return run_preview_pipeline(flask_app, pdf)
+        finally:
+            flask_app.config.update(saved)
+
+    preview(SAMPLE_PDF)
+    changed_page = rendered[0]
+    revised_path = str(tmp_path / "revised.pdf")
+    revise_page(SAMPLE_PDF, revised_path, changed_page)
+
+    payload = preview(revised_path)
+    assert rendered == [changed_page] and parsed == [changed_page]
+    assert payload == preview(revised_path, PAGE_CACHE_ENABLED=False)
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pdfplumber
+import pytest
+
+from app import app as flask_app
+from helpers.extract.routes.extract_preview_handler import DEFAULT_PDF_PATH, run_preview_pipeline
+from helpers.extract.services.parallel_pages import shutdown_page_pool
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def folder_bytes(folder):
+    files = {}
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, folder)] = f.read()
+    return files
+
+def run_preview(tmp_path, name, workers):
+    folder = tmp_path / name
+    config = {
+        "TESTING": True,
+        "PARALLEL_PAGE_WORKERS": workers,
+        "EXTRACTED_SHAPES_FOLDER": str(folder),
+        "PAGE_CACHE_ENABLED": False
+    }
+    saved = { key: flask_app.config.get(key) for key in config }
+    flask_app.config.update(config)
+    try:
+        with flask_app.app_context(), pdfplumber.open(os.path.join(BASE_DIR, DEFAULT_PDF_PATH)) as pdf:
+            payload = run_preview_pipeline(flask_app, pdf)
+    finally:
+        flask_app.config.update(saved)
+    return json.dumps(payload, sort_keys=True).encode("utf-8"), folder_bytes(folder)
+
+@pytest.fixture
+def page_pool():
+    yield
+    shutdown_page_pool()
+
+def test_parallel_pages_match_serial_byte_for_byte(tmp_path, page_pool):
+    serial_json, serial_files = run_preview(tmp_path, "serial", 0)
+    parallel_json, parallel_files = run_preview(tmp_path, "parallel", 2)
+
+    assert serial_files
+    assert parallel_json == serial_json
+    assert parallel_files.keys() == serial_files.keys()
+    assert all(parallel_files[name] == serial_files[name] for name in serial_files)
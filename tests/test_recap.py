@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from helpers.extract.services.recap import recap_payload, recap_rows
+
+def test_weight_per_diameter_from_extractor_rows():
+    rows = [
+        { "ozn": 1, "diameter": 16, "lg": 4.15, "n": 10, "lgn": 41.5 },
+        { "ozn": 2, "diameter": 16, "lg": 2.0, "n": 5, "lgn": 10.0 },
+        { "ozn": 3, "diameter": 8, "lg": 1.0, "n": 4, "lgn": 4.0 },
+        { "ozn": 4, "diameter": None, "lg": 1.0, "n": 1, "lgn": 1.0 }
+    ]
+    recap = recap_rows(rows)
+
+    assert [d["diameter"] for d in recap["by_diameter"]] == [8, 16]
+    sixteen = recap["by_diameter"][1]
+    assert sixteen["n"] == 15 and sixteen["lgn"] == 51.5
+    assert sixteen["weight"] == pytest.approx(51.5 * 1.58, abs=0.01)
+    assert recap["total"]["weight"] == pytest.approx(51.5 * 1.58 + 4.0 * 0.395, abs=0.01)
+    assert "by_position" not in recap
+
+def test_payload_recap_keeps_position_order():
+    payload = [
+        { "position": "Zid (1 kom)", "rows": [{ "ozn": 1, "diameter": 12, "lg": 1.0, "n": 2, "lgn": 2.0 }] },
+        { "position": "Ploča (1 kom)", "rows": [{ "ozn": 1, "diameter": 10, "lg": 1.0, "n": 3, "lgn": 3.0 }] }
+    ]
+    recap = recap_payload(payload)
+
+    assert [p["position"] for p in recap["by_position"]] == ["Zid (1 kom)", "Ploča (1 kom)"]
+    assert recap["by_position"][0]["diameters"][0]["weight"] == pytest.approx(2.0 * 0.888, abs=0.01)
+
+def test_unlisted_and_fractional_values_stay_valid_json():
+    rows = [
+        { "ozn": 1, "diameter": 10.5, "lg": 1.0, "n": 2.5, "lgn": 10.0 },
+        { "ozn": 2, "diameter": 0, "lg": 1.0, "n": 1, "lgn": 1.0 }
+    ]
+    recap = recap_rows(rows)
+
+    json.dumps(recap, allow_nan=False)
+    zero, fractional = recap["by_diameter"]
+    assert zero["diameter"] == 0 and zero["kg_per_m"] == 0
+    assert fractional["diameter"] == 10.5 and fractional["n"] == 2.5
+    assert fractional["weight"] == pytest.approx(10.0 * fractional["kg_per_m"], abs=0.01)
+    assert recap["total"]["n"] == 3.5
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pdfplumber
+import pytest
+from PIL import Image, ImageChops
+
+from app import app as flask_app
+from helpers.extract.core.page_analysis import PageAnalysisCache
+from helpers.extract.routes.extract_preview_handler import DEFAULT_PDF_PATH, INDICATOR_TEXTS
+from helpers.extract.services.extract_from_pdf import process_page
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Region renders may differ from the full-page render in the odd edge pixel
+MAX_DIFFERING_PIXELS = 0.001
+
+def render_crops(folder, render_mode, preview_mode):
+    config = {
+        "TESTING": True,
+        "EXTRACTED_SHAPES_FOLDER": str(folder),
+        "SHAPE_RENDER_MODE": render_mode,
+        "PREVIEW_MODE": preview_mode,
+        "SHAPE_STORE": "request"
+    }
+    saved = { key: flask_app.config.get(key) for key in config }
+    flask_app.config.update(config)
+    crops = {}
+    try:
+        with flask_app.app_context(), pdfplumber.open(os.path.join(BASE_DIR, DEFAULT_PDF_PATH)) as pdf:
+            for page_num, analysis in PageAnalysisCache(pdf, INDICATOR_TEXTS):
+                if not analysis.contains_indicator:
+                    continue
+                page_result = process_page(flask_app, analysis, page_num, "modes", diagnostics=True)
+                for image, record in zip(page_result["images"], page_result["diagnostics"]):
+                    with Image.open(os.path.join(str(folder), image["img_path_segment"])) as crop:
+                        crops[(page_num, record["row_index"])] = (record["scaled_crop_bbox"], crop.convert("L"))
+    finally:
+        flask_app.config.update(saved)
+    return crops
+
+@pytest.fixture(scope="module")
+def page_mode_crops(tmp_path_factory):
+    return render_crops(tmp_path_factory.mktemp("page"), "page", "shape")
+
+@pytest.mark.parametrize("render_mode,preview_mode", [("column", "shape"), ("column", "off"), ("page", "low"), ("page", "off")])
+def test_crops_match_page_mode(tmp_path, page_mode_crops, render_mode, preview_mode):
+    crops = render_crops(tmp_path, render_mode, preview_mode)
+
+    assert page_mode_crops and crops.keys() == page_mode_crops.keys()
+    for key, (bbox, crop) in crops.items():
+        page_bbox, page_crop = page_mode_crops[key]
+        assert bbox == pytest.approx(page_bbox, abs=0.5)
+        assert crop.size == page_crop.size
+        differing = np.count_nonzero(np.asarray(ImageChops.difference(crop, page_crop)))
+        assert differing <= MAX_DIFFERING_PIXELS * crop.width * crop.height, key
+
+def test_preview_follows_preview_mode(tmp_path):
+    render_crops(tmp_path / "low", "page", "low")
+    render_crops(tmp_path / "off", "page", "off")
+
+    preview_path = next((tmp_path / "low" / "modes").glob("preview_*.png"))
+    page_num = int(preview_path.stem.split("_")[1])
+    with Image.open(preview_path) as preview, pdfplumber.open(os.path.join(BASE_DIR, DEFAULT_PDF_PATH)) as pdf:
+        # PREVIEW_DPI 72 renders the page at one pixel per point
+        assert abs(preview.width - pdf.pages[page_num].width) <= 1
+    assert not list((tmp_path / "off" / "modes").glob("preview_*.png"))
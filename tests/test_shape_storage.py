@@ -0,0 +1,38 @@
+import os
+
+from flask import Flask
+
+from helpers.extract.services.result_cache import ResultCache
+from helpers.extract.services.shape_storage import get_shape_storage
+
+def test_storage_follows_the_configured_folder(tmp_path):
+    app = Flask(__name__)
+    app.config.update(EXTRACTED_SHAPES_FOLDER=str(tmp_path / "a"), SHAPES_TTL_SECONDS=60)
+    first = get_shape_storage(app)
+    app.config.update(EXTRACTED_SHAPES_FOLDER=str(tmp_path / "b"), SHAPES_TTL_SECONDS=30)
+    second = get_shape_storage(app)
+
+    assert first.root == str(tmp_path / "a")
+    assert second.root == str(tmp_path / "b") and second.ttl_seconds == 30
+
+def test_cache_hit_touches_the_shapes_it_hands_out(tmp_path):
+    shapes_root = tmp_path / "extracted_shapes"
+    (shapes_root / "1700000000").mkdir(parents=True)
+    (shapes_root / "shapes").mkdir()
+    (shapes_root / "1700000000" / "page_0_row_1_cell_1.png").write_bytes(b"png")
+    (shapes_root / "shapes" / "abc.png").write_bytes(b"png")
+    for path in (shapes_root / "1700000000", shapes_root / "1700000000" / "page_0_row_1_cell_1.png", shapes_root / "shapes" / "abc.png"):
+        os.utime(path, (1, 1))
+
+    cache = ResultCache(str(tmp_path / "cache"), str(shapes_root), 1024 * 1024)
+    cache.put("key", [{ "position": "Zid", "rows": [
+        { "oblikIMere": "extracted_shapes/1700000000/page_0_row_1_cell_1.png" },
+        { "oblikIMere": "extracted_shapes/shapes/abc.png" }
+    ] }])
+
+    assert cache.get("key") is not None
+    assert os.path.getmtime(shapes_root / "1700000000") > 1
+    assert os.path.getmtime(shapes_root / "shapes" / "abc.png") > 1
+
+    os.remove(shapes_root / "shapes" / "abc.png")
+    assert cache.get("key") is None
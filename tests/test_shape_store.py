@@ -0,0 +1,44 @@
+import os
+
+from PIL import Image
+
+from helpers.extract.core.shape_store import ContentAddressedShapeStore
+
+def test_swept_shape_is_written_again(tmp_path):
+    store = ContentAddressedShapeStore(str(tmp_path))
+    image = Image.new("RGB", (8, 4), "white")
+
+    url = store.save(image)
+    path = os.path.join(str(tmp_path), url)
+    os.remove(path)
+
+    assert store.save(image) == url
+    assert os.path.isfile(path)
+
+def test_reused_shape_is_touched(tmp_path):
+    store = ContentAddressedShapeStore(str(tmp_path))
+    image = Image.new("RGB", (8, 4), "white")
+
+    path = os.path.join(str(tmp_path), store.save(image))
+    os.utime(path, (1, 1))
+    store.save(image)
+
+    assert os.path.getmtime(path) > 1
+
+class FailingWriter:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, image, path, atomic=False, on_done=None):
+        self.writes.append(path)
+        on_done()
+
+def test_failed_write_is_not_remembered(tmp_path):
+    store = ContentAddressedShapeStore(str(tmp_path))
+    image = Image.new("RGB", (8, 4), "white")
+    writer = FailingWriter()
+
+    store.save(image, writer)
+    store.save(image, writer)
+
+    assert len(writer.writes) == 2
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from helpers.extract.core import table_templates
+from helpers.extract.core.table_templates import (
+    column_plan,
+    register_template,
+    resolve_table_template,
+    table_fingerprint
+)
+
+def make_table(column_xs):
+    cells = [(x, 0, x + 10, 10) for x in column_xs]
+    return SimpleNamespace(bbox=(column_xs[0], 0, column_xs[-1] + 10, 10), cells=cells)
+
+def test_known_layout_resolves_by_column_count():
+    header = ["Ozn"] + [""] * 11
+    fingerprint = table_fingerprint(make_table([100 + 20 * i for i in range(12)]), header)
+    assert resolve_table_template(fingerprint)["name"] == "cad-12-columns"
+
+def test_unknown_layout_falls_back_and_plans_missing_columns_as_none():
+    header = ["Ozn", "Oblik", "Ø"]
+    fingerprint = table_fingerprint(make_table([0, 20, 40]), header)
+    assert resolve_table_template(fingerprint) is None
+    assert column_plan({ "ozn": 0, "diameter": 2, "lg": 3 }, 3) == (("ozn", 0), ("diameter", 2), ("lg", None))
+
+def test_header_keywords_select_a_template(monkeypatch):
+    template = { "name": "custom", "header_keywords": ["Šipke Ø"], "mapping": { "ozn": 1 } }
+    monkeypatch.setattr(table_templates, "TABLE_TEMPLATES", [template])
+    resolve_table_template.cache_clear()
+    try:
+        fingerprint = table_fingerprint(make_table([0, 20]), ["POZ", "sipke ø"])
+        assert resolve_table_template(fingerprint) is template
+    finally:
+        resolve_table_template.cache_clear()
+
+def test_registered_layout_replaces_a_cached_miss(monkeypatch):
+    monkeypatch.setattr(table_templates, "TABLE_TEMPLATES", [])
+    resolve_table_template.cache_clear()
+    try:
+        fingerprint = table_fingerprint(make_table([0, 25, 60]), ["POZ", "", ""])
+        assert resolve_table_template(fingerprint) is None
+
+        template = { "name": "offsets", "column_offsets": (0, 24, 61), "mapping": { "ozn": 0 } }
+        register_template(template)
+        assert resolve_table_template(fingerprint) is template
+        assert resolve_table_template(table_fingerprint(make_table([0, 30, 60]), ["POZ", "", ""])) is None
+    finally:
+        resolve_table_template.cache_clear()